@@ -1,26 +1,28 @@
 import logging
-from app.core.logging_config import configure_logging
+import threading
+import time
 from app.db.Connection import database
+from app.db.redis_keys import config_key
 from fastapi import Request
 import redis.exceptions
 
-logger = configure_logging()
+logger = logging.getLogger(__name__)
 RATE_LIMIT_DEFAULT_LIMIT = 100
 RATE_LIMIT_DEFAULT_WINDOW = 60 
-RATE_LIMIT_VALUE_KEY = "config:RATE_LIMIT_LIMIT"
-RATE_LIMIT_WINDOW_KEY = "config:RATE_LIMIT_WINDOW"
+RATE_LIMIT_VALUE_KEY = config_key("RATE_LIMIT_LIMIT")
+RATE_LIMIT_WINDOW_KEY = config_key("RATE_LIMIT_WINDOW")
 
 def get_rate_limit_config(database):
     limit, window = RATE_LIMIT_DEFAULT_LIMIT, RATE_LIMIT_DEFAULT_WINDOW
     try:
-        limit_str = database.redis_client.get(RATE_LIMIT_VALUE_KEY)
-        window_str = database.redis_client.get(RATE_LIMIT_WINDOW_KEY)
+        # Both keys share the {config} hash tag, so this is one MGET on one node
+        limit_str, window_str = database.get_redis().mget([RATE_LIMIT_VALUE_KEY, RATE_LIMIT_WINDOW_KEY])
         limit = int(limit_str) if limit_str else limit
         window = int(window_str) if window_str else window
     except (redis.exceptions.ConnectionError, ValueError):
         logger.warning(
-            f"Failed to fetch/parse dynamic rate limit config. "
-            f"Using defaults: {limit} requests per {window} seconds."
+            "Failed to fetch/parse dynamic rate limit config. "
+            "Using defaults: %s requests per %s seconds.", limit, window
         )
     return limit, window
 
@@ -38,8 +40,7 @@ def is_admin_path(path: str) -> bool:
 
 def check_rate_limit(database, key: str, limit: int, window: int):
     try:
-        database.redis_client.ping()
-        current = database.redis_client.get(key)
+        current = database.get_redis().get(key)
     except redis.exceptions.ConnectionError:
         logger.warning("Redis connection failed. Rate limiting skipped (fail open).")
         return None  # Skip rate limiting if Redis is down
@@ -47,9 +48,33 @@ def check_rate_limit(database, key: str, limit: int, window: int):
     if current and int(current) >= limit:
         return False  # Limit exceeded
 
-    pipe = database.redis_client.pipeline()
+    pipe = database.get_redis().pipeline()
     pipe.incr(key, 1)
     if not current:
         pipe.expire(key, window)
-    pipe.execute()
+    try:
+        pipe.execute()
+    except redis.exceptions.ConnectionError:
+        logger.warning("Redis connection failed. Rate limiting skipped (fail open).")
+        return None
+    return True
+
+
+_local_windows = {}
+_local_lock = threading.Lock()
+
+
+def check_local_rate_limit(key: str, limit: int, window: int) -> bool:
+    """Fixed-window counter in this worker's memory, for nodes that run without
+    Redis (SNAPSHOT_AUTHORITATIVE); the limit is per worker, not global."""
+    now = time.monotonic()
+    with _local_lock:
+        if len(_local_windows) > 100000:
+            _local_windows.clear()
+        window_start, count = _local_windows.get(key, (now, 0))
+        if now - window_start >= window:
+            window_start, count = now, 0
+        if count >= limit:
+            return False
+        _local_windows[key] = (window_start, count + 1)
     return True
@@ -8,6 +8,9 @@ from app.core.config import settings
 from app.db.Connection import database
 from app.schemas.URLInfoResponse import URLInfoResponse
 from app.schemas.URLCreateRequest import URLCreateRequest 
+from app.schemas.ResolveRequest import ResolveRequest
+from app.schemas.ResolveResponse import ResolveResponse, ResolvedURL
+from app.utils.encoding import normalize_short_code
 from app.services.shortener import URLService
 from app.services import RedisURLCache, metrics
 from app.db.Models import models
@@ -23,12 +26,12 @@ def shorten_url_endpoint(url_request: URLCreateRequest, db: Session = Depends(da
     except ValueError as e:
         original_url_str = str(url_request.original_url)
         logger.error(
-            f"Failed to create short URL for {original_url_str[:50]}.. due to: {str(e)}"
+            "Failed to create short URL for %.50s.. due to: %s", original_url_str, e
         )
         raise HTTPException(status_code=409, detail=str(e)) 
 
     logger.info(
-        f"API success: Shortened {db_url.original_url[:50]}... to {db_url.short_code}"
+        "API success: Shortened %.50s... to %s", db_url.original_url, db_url.short_code
     )
     return URLInfoResponse(
         original_url=db_url.original_url,
@@ -39,16 +42,44 @@ def shorten_url_endpoint(url_request: URLCreateRequest, db: Session = Depends(da
         click_count=db_url.click_count,
     )
 
+@router.post("/v1/resolve", response_model=ResolveResponse, response_model_by_alias=True)
+def resolve_urls_endpoint(resolve_request: ResolveRequest, db: Session = Depends(database.get_db)):
+    # Snapshot-only nodes have no database to read metadata from
+    with_metadata = resolve_request.include_metadata and not settings.SNAPSHOT_AUTHORITATIVE
+    if with_metadata:
+        rows = URLService.resolve_many_with_metadata(db, resolve_request.short_codes)
+        resolved = {short_code: db_url.original_url for short_code, db_url in rows.items()}
+    else:
+        rows, resolved = {}, URLService.resolve_many(db, resolve_request.short_codes)
+    results = []
+    for short_code in resolve_request.short_codes:
+        normalized = normalize_short_code(short_code)
+        original_url = resolved.get(normalized)
+        db_url = rows.get(normalized)
+        results.append(ResolvedURL(
+            short_code=normalized,
+            found=original_url is not None,
+            original_url=original_url,
+            short_url=f"{settings.BASE_URL}/{normalized}" if original_url else None,
+            created_at=db_url.created_at if db_url else None,
+            last_accessed_at=db_url.last_accessed_at if db_url else None,
+            click_count=db_url.click_count if db_url else None,
+            is_active=db_url.is_active if db_url else None,
+        ))
+    return ResolveResponse(results=results)
+
 @router.get("/{short_code}", tags=["redirect"])
 def redirect_to_url_endpoint(short_code: str, request: Request, background_tasks: BackgroundTasks, db: Session = Depends(database.get_db)):
     cached_url = RedisURLCache.get(short_code, request)
     if cached_url:
         metrics.update_stat(request ,background_tasks, short_code)
         return RedirectResponse(url=cached_url, status_code=status.HTTP_302_FOUND)
+    if settings.SNAPSHOT_AUTHORITATIVE:
+        raise HTTPException(status_code=404, detail="URL not found")
    
     db_url = URLService.get_url_by_short_code(db, short_code)
     if db_url is None:
-        logger.warning(f"Redirect 404: Short code not found: {short_code}")
+        logger.warning("Redirect 404: Short code not found: %s", short_code)
         raise HTTPException(status_code=404, detail="URL not found")
 
     metrics.update_stat(request ,background_tasks, short_code)
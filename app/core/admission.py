@@ -0,0 +1,151 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Optional
+
+from app.core.config import settings
+from app.RateLimitHelper import is_admin_path
+
+logger = logging.getLogger(__name__)
+
+# AIMD: +1/limit per fast request (~+1 per window), x0.9 on a slow one (at most once per target interval)
+DECREASE_FACTOR = 0.9
+
+
+class AdmissionClass:
+    """Concurrency limit + bounded FIFO queue for one traffic class; the limit adapts to latency."""
+
+    def __init__(self, name: str, priority: int, max_limit: int, min_limit: int,
+                 queue_size: int, latency_target_ms: float):
+        self.name = name
+        self.priority = priority
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.queue_size = queue_size
+        self.latency_target_ms = latency_target_ms
+        self.limit = float(max_limit)
+        self.in_flight = 0
+        self.waiters = deque()
+        self._last_decrease = 0.0
+        self._metrics = {"admitted": 0, "queued": 0, "shed": 0}
+
+    def has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def decrease(self):
+        now = time.monotonic()
+        if now - self._last_decrease >= self.latency_target_ms / 1000:
+            self.limit = max(self.min_limit, self.limit * DECREASE_FACTOR)
+            self._last_decrease = now
+
+    def on_complete(self, latency_ms: float) -> bool:
+        """Adjusts the limit; returns True if the request was over the latency target."""
+        if latency_ms > self.latency_target_ms:
+            self.decrease()
+            return True
+        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "waiting": len(self.waiters),
+            **self._metrics,
+        }
+
+
+class AdmissionController:
+    """Per-class admission for the event loop of one worker.
+
+    Lower-priority classes are shed immediately while a higher-priority class has
+    requests waiting, and their limits shrink together with it when it runs over
+    its latency target, so redirects keep the threadpool and DB pool under overload."""
+
+    def __init__(self, classes: list, queue_timeout_ms: float):
+        self.classes = {cls.name: cls for cls in classes}
+        self.queue_timeout = queue_timeout_ms / 1000
+
+    def classify(self, method: str, path: str) -> Optional[AdmissionClass]:
+        if path == "/health" or path in ("/docs", "/redoc", "/openapi.json"):
+            return None
+        if is_admin_path(path):
+            return self.classes["admin"]
+        if method == "POST" and path != "/v1/resolve":  # batch resolve is a read
+            return self.classes["shorten"]
+        return self.classes["redirect"]
+
+    def _higher_priority_waiting(self, cls: AdmissionClass) -> bool:
+        return any(other.waiters for other in self.classes.values() if other.priority < cls.priority)
+
+    async def acquire(self, cls: AdmissionClass) -> bool:
+        if self._higher_priority_waiting(cls):
+            return self._shed(cls)
+        if cls.has_capacity() and not cls.waiters:
+            cls.in_flight += 1
+            cls._metrics["admitted"] += 1
+            return True
+        if len(cls.waiters) >= cls.queue_size:
+            return self._shed(cls)
+
+        waiter = asyncio.get_running_loop().create_future()
+        cls.waiters.append(waiter)
+        cls._metrics["queued"] += 1
+        try:
+            # The slot is handed over (in_flight incremented) by release()
+            await asyncio.wait_for(waiter, self.queue_timeout)
+            cls._metrics["admitted"] += 1
+            return True
+        except asyncio.TimeoutError:
+            return self._shed(cls)
+        except asyncio.CancelledError:
+            # Client went away after being handed a slot: give it back
+            if waiter.done() and not waiter.cancelled():
+                cls.in_flight -= 1
+                self._wake(cls)
+            raise
+        finally:
+            if waiter in cls.waiters:
+                cls.waiters.remove(waiter)
+
+    def _shed(self, cls: AdmissionClass) -> bool:
+        cls._metrics["shed"] += 1
+        logger.warning("Admission control: shed %s request (limit %d, waiting %d)",
+                       cls.name, int(cls.limit), len(cls.waiters))
+        return False
+
+    def release(self, cls: AdmissionClass, latency_ms: float):
+        cls.in_flight -= 1
+        if cls.on_complete(latency_ms):
+            for other in self.classes.values():
+                if other.priority > cls.priority:
+                    other.decrease()
+        self._wake(cls)
+
+    def _wake(self, cls: AdmissionClass):
+        while cls.waiters and cls.has_capacity():
+            waiter = cls.waiters.popleft()
+            if not waiter.done():
+                cls.in_flight += 1
+                waiter.set_result(True)
+
+    def stats(self) -> dict:
+        return {name: cls.stats() for name, cls in self.classes.items()}
+
+
+def build_admission_controller() -> AdmissionController:
+    return AdmissionController(
+        [
+            AdmissionClass("redirect", 0, settings.ADMISSION_REDIRECT_LIMIT, 4,
+                           settings.ADMISSION_REDIRECT_QUEUE, settings.ADMISSION_REDIRECT_LATENCY_MS),
+            AdmissionClass("shorten", 1, settings.ADMISSION_SHORTEN_LIMIT, 2,
+                           settings.ADMISSION_SHORTEN_QUEUE, settings.ADMISSION_SHORTEN_LATENCY_MS),
+            AdmissionClass("admin", 2, settings.ADMISSION_ADMIN_LIMIT, 1,
+                           settings.ADMISSION_ADMIN_QUEUE, settings.ADMISSION_ADMIN_LATENCY_MS),
+        ],
+        settings.ADMISSION_QUEUE_TIMEOUT_MS,
+    )
+
+
+admission_controller = build_admission_controller()
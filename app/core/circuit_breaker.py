@@ -0,0 +1,123 @@
+import logging
+import random
+import threading
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Fail-fast guard around a remote dependency.
+
+    closed    -> calls go through; `failure_threshold` consecutive failures open it
+    open      -> calls are rejected immediately until a jittered, exponentially
+                 growing backoff expires (or the health monitor sees the dependency up)
+    half_open -> a single probe call is let through; success closes, failure re-opens
+    """
+
+    def __init__(self, name: str, failure_threshold: int = None, reset_timeout: float = None,
+                 max_reset_timeout: float = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.CIRCUIT_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout or settings.CIRCUIT_RESET_TIMEOUT
+        self.max_reset_timeout = max_reset_timeout or settings.CIRCUIT_MAX_RESET_TIMEOUT
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._open_count = 0
+        self._retry_at = 0.0
+        self._probe_in_flight = False
+        self._metrics = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() >= self._retry_at:
+                self._transition(HALF_OPEN)
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self._metrics["rejected"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._metrics["successes"] += 1
+            self._consecutive_failures = 0
+            self._probe_in_flight = False
+            if self._state != CLOSED:
+                self._open_count = 0
+                self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._metrics["failures"] += 1
+            self._consecutive_failures += 1
+            self._probe_in_flight = False
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._consecutive_failures >= self.failure_threshold):
+                self._trip()
+
+    def release_probe(self):
+        """Call when a guarded call is over, whatever its outcome: a probe that ended
+        without record_success/record_failure must not keep the circuit half-open."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_probe(self, healthy: bool):
+        """Out-of-band result from the health monitor."""
+        with self._lock:
+            if healthy and self._state == OPEN:
+                # Let the next real call through as the half-open probe
+                self._retry_at = 0.0
+            elif healthy and self._state == HALF_OPEN:
+                self._probe_in_flight = False
+            elif not healthy and self._state != OPEN:
+                self._trip()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"state": self._state, **self._metrics}
+
+    def _trip(self):
+        self._open_count += 1
+        backoff = min(self.max_reset_timeout, self.reset_timeout * 2 ** (self._open_count - 1))
+        self._retry_at = time.monotonic() + backoff * random.uniform(0.5, 1.0)
+        self._metrics["opened"] += 1
+        self._transition(OPEN)
+
+    def _transition(self, state: str):
+        if state != self._state:
+            logger.warning("Circuit breaker '%s': %s -> %s", self.name, self._state, state)
+            self._state = state
+
+
+redis_breaker = CircuitBreaker("redis")
+db_breaker = CircuitBreaker("database")
+
+# REDIS_MODE=ring/cluster: one breaker per node, so a single bad shard does not
+# fail the others fast ("host:port" -> breaker, created on first use)
+redis_node_breakers = {}
+
+
+def redis_node_breaker(node: str) -> CircuitBreaker:
+    breaker = redis_node_breakers.get(node)
+    if breaker is None:
+        breaker = redis_node_breakers.setdefault(node, CircuitBreaker(f"redis:{node}"))
+    return breaker
+
+
+def redis_breaker_stats() -> dict:
+    if redis_node_breakers:
+        return {node: breaker.stats() for node, breaker in sorted(redis_node_breakers.items())}
+    return redis_breaker.stats()
@@ -10,8 +10,88 @@ class Settings(BaseSettings):
     
     REDIS_HOST: str
     REDIS_PORT: int = 6379
+    # "single" (REDIS_HOST/REDIS_PORT), "cluster" (Redis Cluster) or "ring"
+    # (client-side consistent hashing); REDIS_NODES is "host:port,host:port"
+    REDIS_MODE: str = "single"
+    REDIS_NODES: str = ""
+    # Per-command read timeout: a Redis that accepts connections but stops answering
+    # must surface as a failure to the circuit breaker, not block request threads
+    REDIS_SOCKET_TIMEOUT: float = 0.5
     BASE_URL: str = "http://localhost:8080"
 
+    RESOLVE_MAX_CODES: int = 100
+
+    # Lookup key for short codes: "string" (urls.short_code) or "integer"
+    # (urls.code_id BIGINT; aliases that can't be encoded fall back to short_code)
+    SHORT_CODE_STORAGE: str = "string"
+    # Integer mode: retry a code_id miss by short_code for rows not backfilled yet
+    # (written by old instances mid-rollout). Costs a second query per miss; turn it
+    # off once `python -m app.db.migrate` has run after the rollout
+    CODE_ID_FALLBACK: bool = True
+
+    # Redirects append click events to a Redis Stream instead of updating the DB;
+    # run `python -m app.workers.click_consumer` to write them to Postgres
+    CLICK_STREAM_ENABLED: bool = False
+    # Approximate stream cap: oldest events are trimmed when the consumer lags
+    CLICK_STREAM_MAXLEN: int = 1000000
+    CLICK_CONSUMER_BATCH: int = 1000
+    CLICK_CONSUMER_BLOCK_MS: int = 1000
+
+    # Admission control per traffic class (priority redirect > shorten > admin):
+    # max concurrency (adapted down/up by latency vs. target), queue size. The
+    # limits add up to less than AnyIO's 40-thread pool the sync endpoints run
+    # on, otherwise admitted requests would still queue, unseen, for a thread
+    ADMISSION_CONTROL_ENABLED: bool = False
+    ADMISSION_QUEUE_TIMEOUT_MS: float = 200
+    ADMISSION_REDIRECT_LIMIT: int = 28
+    ADMISSION_REDIRECT_QUEUE: int = 256
+    ADMISSION_REDIRECT_LATENCY_MS: float = 100
+    ADMISSION_SHORTEN_LIMIT: int = 8
+    ADMISSION_SHORTEN_QUEUE: int = 32
+    ADMISSION_SHORTEN_LATENCY_MS: float = 250
+    ADMISSION_ADMIN_LIMIT: int = 2
+    ADMISSION_ADMIN_QUEUE: int = 4
+    ADMISSION_ADMIN_LATENCY_MS: float = 1000
+
+    LOG_LEVEL: str = "INFO"
+    # "text" or "json"
+    LOG_FORMAT: str = "text"
+    # Log through a QueueHandler; a listener thread formats and writes to stdout
+    LOG_ASYNC: bool = True
+    LOG_QUEUE_SIZE: int = 10000
+    # Max records per second for each distinct message below ERROR (0 = unlimited)
+    LOG_EVENT_RATE_LIMIT: float = 20
+    # Requests slower than this are logged as warnings (0 = off)
+    SLOW_REQUEST_THRESHOLD_MS: float = 500
+
+    # Redirect cache layout: "string" (one url:{code} key per link) or "compact"
+    # (links bucketed into small listpack hashes, see app/utils/cache_encoding.py)
+    CACHE_LAYOUT: str = "string"
+    CACHE_COMPACT_BUCKETS: int = 65536
+    # Compress URLs at least this long in the compact layout (0 = never)
+    CACHE_COMPRESS_MIN_LENGTH: int = 0
+    # Fraction of compact writes that also sweep expired fields out of their bucket
+    # (expired fields are always dropped when read; 0 = read-time cleanup only)
+    CACHE_COMPACT_SWEEP_RATE: float = 0.01
+
+    # Memory-mapped redirect snapshot checked before Redis ("" = off), see
+    # app/services/snapshot.py; authoritative = a snapshot miss is a 404 and
+    # redirects touch neither Redis nor Postgres
+    SNAPSHOT_DIR: str = ""
+    SNAPSHOT_REFRESH_SECONDS: float = 5.0
+    SNAPSHOT_AUTHORITATIVE: bool = False
+    # A delta build merges the existing deltas into one once there are this many,
+    # so lookups (which check every delta) stay bounded between full builds
+    SNAPSHOT_MAX_DELTAS: int = 8
+
+    # Circuit breakers (Redis always, DB when DB_CIRCUIT_BREAKER) and the
+    # background health monitor that feeds them and /health
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_TIMEOUT: float = 1.0
+    CIRCUIT_MAX_RESET_TIMEOUT: float = 30.0
+    DB_CIRCUIT_BREAKER: bool = False
+    HEALTH_CHECK_INTERVAL: float = 5.0
+
     class Config:
         env_file = ".env"
 
@@ -1,19 +1,179 @@
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import random
 import sys
+import threading
+import time
 
-def configure_logging():
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s | %(levelname)s | %(name)s | %(funcName)s:%(lineno)d | %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S',
-        handlers=[
-            logging.StreamHandler(sys.stdout)
-        ]
+from app.core.config import settings
+
+TEXT_FORMAT = '%(asctime)s | %(levelname)s | %(name)s | %(funcName)s:%(lineno)d | %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+_listener = None
+_queue_handler = None
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        payload = {
+            "ts": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "func": record.funcName,
+            "line": record.lineno,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "suppressed", 0):
+            payload["suppressed"] = record.suppressed
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+class EventRateLimitFilter(logging.Filter):
+    """Drops high-volume records below ERROR.
+
+    - per event (logger name + unformatted message template): at most
+      `per_second` records per second; the next emitted record carries the
+      number suppressed in between as `record.suppressed`
+    - per call: `logger.info(..., extra={"sample_rate": 0.01})` keeps ~1%
+    """
+
+    def __init__(self, per_second: float):
+        super().__init__()
+        self.per_second = per_second
+        self._lock = threading.Lock()
+        self._windows = {}
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR:
+            return True
+        sample_rate = getattr(record, "sample_rate", None)
+        if sample_rate is not None and random.random() >= sample_rate:
+            return False
+        if not self.per_second:
+            return True
+
+        event = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            if len(self._windows) > 10000:
+                self._windows.clear()
+            window_start, count, suppressed = self._windows.get(event, (now, 0, 0))
+            if now - window_start >= 1.0:
+                window_start, count = now, 0
+            if count >= self.per_second:
+                self._windows[event] = (window_start, count, suppressed + 1)
+                return False
+            self._windows[event] = (window_start, count + 1, 0)
+        record.suppressed = suppressed
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread without formatting them and drops
+    (counts) records instead of blocking when the queue is full. Until a listener
+    is started (gunicorn master before fork, CLI tools) records are written
+    directly by `fallback`."""
+
+    dropped = 0
+
+    def __init__(self, queue, fallback: logging.Handler = None):
+        super().__init__(queue)
+        self.fallback = fallback
+
+    def emit(self, record):
+        if self.queue is None:
+            self.fallback.handle(record)
+            return
+        super().emit(record)
+
+    def prepare(self, record):
+        # Formatting happens in the listener thread, off the request path
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+def _build_output_handler():
+    handler = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT.lower() == "json":
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT))
+    return handler
+
+
+def start_log_listener():
+    """Starts the listener thread. Called from the app lifespan (inside each worker,
+    after fork) and by long-running processes, never at import: a thread running in
+    the gunicorn master across fork() could hold a lock the child then deadlocks on."""
+    global _listener
+    if _queue_handler is None or _listener is not None:
+        return
+    _queue_handler.queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _listener = logging.handlers.QueueListener(
+        _queue_handler.queue, _queue_handler.fallback, respect_handler_level=True
     )
+    _listener.start()
+
+
+def stop_log_listener():
+    """Flushes queued records and goes back to writing directly (registered with atexit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        _queue_handler.queue = None
+        if NonBlockingQueueHandler.dropped:
+            logging.getLogger(__name__).warning(
+                "%d log records were dropped (queue full)", NonBlockingQueueHandler.dropped
+            )
+
+
+def _after_fork_in_child():
+    # The listener thread is not copied by fork(); write directly until the child starts its own
+    global _listener
+    _listener = None
+    if _queue_handler is not None:
+        _queue_handler.queue = None
+
+
+def log_stats() -> dict:
+    return {
+        "async": _listener is not None,
+        "queued": _queue_handler.queue.qsize() if _queue_handler is not None and _queue_handler.queue else 0,
+        "dropped": NonBlockingQueueHandler.dropped,
+    }
+
+
+def configure_logging():
+    global _queue_handler
+    root = logging.getLogger()
+    if _queue_handler is None and not root.handlers:
+        if settings.LOG_ASYNC:
+            _queue_handler = NonBlockingQueueHandler(None, fallback=_build_output_handler())
+            handler = _queue_handler
+            os.register_at_fork(after_in_child=_after_fork_in_child)
+            atexit.register(stop_log_listener)
+        else:
+            handler = _build_output_handler()
+        handler.addFilter(EventRateLimitFilter(settings.LOG_EVENT_RATE_LIMIT))
+        root.addHandler(handler)
+        root.setLevel(settings.LOG_LEVEL.upper())
 
     logging.getLogger("uvicorn.error").propagate = True
-    
-    logging.getLogger("uvicorn.access").disabled = True 
+
+    logging.getLogger("uvicorn.access").disabled = True
 
     logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
     logging.getLogger("redis").setLevel(logging.WARNING)
@@ -1,27 +1,55 @@
 import logging
+from functools import partial
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
 from redis.connection import ConnectionPool
+from redis.cluster import RedisCluster, ClusterNode
 import redis
+from app.db.Connection.redis_ring import ShardedRedis, parse_node
+from app.core.circuit_breaker import redis_breaker, redis_node_breaker, db_breaker
 from sqlalchemy import text
 
 SQLALCHEMY_DATABASE_URL = f"postgresql://{settings.POSTGRES_USER}:{settings.POSTGRES_PASSWORD}@{settings.POSTGRES_SERVER}:{settings.POSTGRES_PORT}/{settings.POSTGRES_DB}"
 logger = logging.getLogger(__name__)
-engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True, future=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 
+# Pools are built lazily (normally from the app lifespan) so that every worker
+# process owns its own sockets; nothing is opened at import time / before fork.
+class DatabaseUnavailable(Exception):
+    pass
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
 
-pool = ConnectionPool(
-    host=settings.REDIS_HOST,
-    port=settings.REDIS_PORT,
+class BreakerSession(Session):
+    """Asks `breaker` (set by get_db) for permission when the session first needs a
+    connection, not when it is created: requests served from Redis never touch the
+    database and must not be rejected while its circuit is open."""
+
+    breaker = None
+    admitted = False
+
+    def get_bind(self, *args, **kwargs):
+        if self.breaker is not None and not self.admitted:
+            if not self.breaker.allow():
+                raise DatabaseUnavailable("Database circuit is open")
+            self.admitted = True
+        return super().get_bind(*args, **kwargs)
+
+
+SessionLocal = sessionmaker(class_=BreakerSession, autocommit=False, autoflush=False, future=True)
+_engine = None
+_redis_client = None
+
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        _engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True, future=True)
+        SessionLocal.configure(bind=_engine)
+    return _engine
+
+
+REDIS_CONNECTION_KWARGS = dict(
     decode_responses=True,
     max_connections=50,
     socket_connect_timeout=2,
@@ -29,27 +57,281 @@ pool = ConnectionPool(
     retry_on_timeout=True,
 )
 
-redis_client = redis.Redis(connection_pool=pool)
+
+def _redis_connection_kwargs() -> dict:
+    # Read at build time so a process can raise it first (see app.workers.click_consumer)
+    return dict(REDIS_CONNECTION_KWARGS, socket_timeout=settings.REDIS_SOCKET_TIMEOUT)
+
+
+class ClusterRedis(RedisCluster):
+    """RedisCluster whose mget accepts keys from different slots (split per node)."""
+
+    def mget(self, keys, *args):
+        return self.mget_nonatomic(keys, *args)
+
+
+class RedisCircuitOpen(redis.exceptions.ConnectionError):
+    pass
+
+
+def _guarded_call(breaker, fn, *args, **kwargs):
+    return _guarded_call_all((breaker,), fn, *args, **kwargs)
+
+
+def _guarded_call_all(breakers, fn, *args, **kwargs):
+    # Callers already fail open on ConnectionError, so an open circuit (and
+    # timeouts) surface as ConnectionError without touching the network.
+    # A call spanning several nodes (cluster pipeline) needs all of their
+    # breakers and reports its outcome to each: a failure cannot be pinned on one.
+    admitted = []
+    try:
+        for breaker in breakers:
+            if not breaker.allow():
+                raise RedisCircuitOpen(f"Circuit '{breaker.name}' is open")
+            admitted.append(breaker)
+        try:
+            result = fn(*args, **kwargs)
+        except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError) as e:
+            for breaker in admitted:
+                breaker.record_failure()
+            if isinstance(e, redis.exceptions.ConnectionError):
+                raise
+            raise redis.exceptions.ConnectionError(str(e)) from e
+        except redis.exceptions.RedisError:
+            # The server answered (READONLY after a failover, WRONGTYPE, ...)
+            for breaker in admitted:
+                breaker.record_success()
+            raise
+        for breaker in admitted:
+            breaker.record_success()
+        return result
+    finally:
+        for breaker in admitted:
+            breaker.release_probe()
+
+
+class GuardedPipeline:
+    def __init__(self, pipeline, breaker):
+        self.pipeline = pipeline
+        self.breaker = breaker
+
+    def __getattr__(self, name):
+        return getattr(self.pipeline, name)
+
+    def execute(self, *args, **kwargs):
+        return _guarded_call(self.breaker, self.pipeline.execute, *args, **kwargs)
+
+
+class GuardedRedis:
+    """Routes every Redis command of the wrapped client through the circuit breaker."""
+
+    def __init__(self, client, breaker):
+        self.client = client
+        self.breaker = breaker
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        return partial(_guarded_call, self.breaker, attr) if callable(attr) else attr
+
+    def pipeline(self, *args, **kwargs):
+        return GuardedPipeline(self.client.pipeline(*args, **kwargs), self.breaker)
+
+    def close(self):
+        self.client.close()
+        if isinstance(self.client, redis.Redis):
+            self.client.connection_pool.disconnect()
+
+
+class GuardedClusterPipeline:
+    def __init__(self, pipeline, cluster: "GuardedClusterRedis"):
+        self.pipeline = pipeline
+        self.cluster = cluster
+        self.breakers = {}
+
+    def __getattr__(self, name):
+        command = getattr(self.pipeline, name)
+
+        def queue(key, *args, **kwargs):
+            breaker = self.cluster.breaker_for(key)
+            self.breakers[breaker.name] = breaker
+            command(key, *args, **kwargs)
+            return self
+        return queue
+
+    def execute(self):
+        breakers, self.breakers = list(self.breakers.values()), {}
+        return _guarded_call_all(breakers, self.pipeline.execute)
+
+
+class GuardedClusterRedis(GuardedRedis):
+    """Redis Cluster with one breaker per node: a command is checked against the
+    breaker of the node that owns its key, so one failed shard does not open the
+    circuit for the others."""
+
+    def __init__(self, client):
+        super().__init__(client, breaker=None)
+
+    def breaker_for(self, key: str):
+        return redis_node_breaker(self.client.get_node_from_key(key).name)
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
+
+        def command(key, *args, **kwargs):
+            return _guarded_call(self.breaker_for(key), attr, key, *args, **kwargs)
+        return command
+
+    def mget(self, keys: list) -> list:
+        by_node = {}
+        for idx, key in enumerate(keys):
+            by_node.setdefault(self.client.get_node_from_key(key).name, []).append(idx)
+        results = [None] * len(keys)
+        for node, indexes in by_node.items():
+            values = _guarded_call(redis_node_breaker(node), self.client.mget, [keys[idx] for idx in indexes])
+            for idx, value in zip(indexes, values):
+                results[idx] = value
+        return results
+
+    def xread(self, streams: dict, *args, **kwargs):
+        return _guarded_call(self.breaker_for(next(iter(streams))), self.client.xread, streams, *args, **kwargs)
+
+    def xreadgroup(self, groupname: str, consumername: str, streams: dict, *args, **kwargs):
+        return _guarded_call(self.breaker_for(next(iter(streams))), self.client.xreadgroup,
+                             groupname, consumername, streams, *args, **kwargs)
+
+    def pipeline(self, *args, **kwargs):
+        return GuardedClusterPipeline(self.client.pipeline(*args, **kwargs), self)
+
+
+def _redis_nodes():
+    nodes = [node for node in settings.REDIS_NODES.split(",") if node.strip()]
+    return nodes or [f"{settings.REDIS_HOST}:{settings.REDIS_PORT}"]
+
+
+def _guarded_node(node: str, **connection_kwargs) -> GuardedRedis:
+    host, port = parse_node(node)
+    return GuardedRedis(redis.Redis(host=host, port=port, **connection_kwargs), redis_node_breaker(node))
+
+
+def _build_redis_client():
+    mode = settings.REDIS_MODE.lower()
+    connection_kwargs = _redis_connection_kwargs()
+    if mode == "cluster":
+        startup_nodes = [ClusterNode(*parse_node(node)) for node in _redis_nodes()]
+        return GuardedClusterRedis(ClusterRedis(startup_nodes=startup_nodes, **connection_kwargs))
+    if mode == "ring":
+        # Every node is its own GuardedRedis; the ring routes to them
+        return ShardedRedis(_redis_nodes(), client_factory=partial(_guarded_node, **connection_kwargs))
+    pool = ConnectionPool(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        **connection_kwargs,
+    )
+    return GuardedRedis(redis.Redis(connection_pool=pool), redis_breaker)
+
+
+def get_redis():
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = _build_redis_client()
+    return _redis_client
+
+
+def _redis_probes() -> list:
+    """(breaker, ping) per Redis node; ping goes around the breaker."""
+    client = get_redis()
+    if isinstance(client, ShardedRedis):
+        return [(node.breaker, node.client.ping) for node in client.clients.values()]
+    if isinstance(client, GuardedClusterRedis):
+        return [(redis_node_breaker(node.name), partial(client.client.ping, target_nodes=node))
+                for node in client.client.get_primaries()]
+    return [(client.breaker, client.client.ping)]
+
+
+def new_session():
+    get_engine()
+    return SessionLocal()
+
+
+def get_db():
+    db = new_session()
+    if settings.DB_CIRCUIT_BREAKER:
+        db.breaker = db_breaker
+    try:
+        yield db
+    except OperationalError:
+        if db.admitted:
+            db_breaker.record_failure()
+        raise
+    except Exception:
+        # 404/409 HTTPExceptions, validation errors...: the database answered
+        if db.admitted:
+            db_breaker.record_success()
+        raise
+    else:
+        if db.admitted:
+            db_breaker.record_success()
+    finally:
+        if db.admitted:
+            db_breaker.release_probe()
+        db.close()
+
+
+def init_connections():
+    get_engine()
+    get_redis()
+
+
+def close_connections():
+    global _engine, _redis_client
+    if _engine is not None:
+        try:
+            _engine.dispose()
+        except Exception:
+            logger.debug("Error disposing DB engine")
+        _engine = None
+    if _redis_client is not None:
+        try:
+            _redis_client.close()
+        except Exception:
+            logger.debug("Error closing Redis client")
+        _redis_client = None
+
 
 def verify_redis_connection():
+    """Pings every node and reports each result to that node's breaker (this probe is
+    what tells an open breaker the node is back); True if all nodes answered."""
     try:
-        redis_client.ping()
-        logger.info("Redis connection verified")
-        return True
-    except redis.exceptions.ConnectionError as e:
-        logger.warning(f"Redis connection failed: {e}. Service will run with degraded performance.")
-        return False
+        probes = _redis_probes()
     except Exception as e:
-        logger.error(f"Unexpected Redis error: {e}")
+        logger.warning(f"Redis connection failed: {e}. Service will run with degraded performance.")
         return False
+    all_ok = True
+    for breaker, ping in probes:
+        try:
+            ping()
+            ok = True
+        except redis.exceptions.ConnectionError as e:
+            logger.warning(f"Redis connection failed ({breaker.name}): {e}. Service will run with degraded performance.")
+            ok = False
+        except Exception as e:
+            logger.error(f"Unexpected Redis error ({breaker.name}): {e}")
+            ok = False
+        breaker.record_probe(ok)
+        all_ok = all_ok and ok
+    if all_ok:
+        logger.debug("Redis connection verified")
+    return all_ok
 
 
 def verify_database_connection():
     try:
-        with engine.connect() as conn:
+        with get_engine().connect() as conn:
             conn.execute(text("SELECT 1"))
-        logger.info("Database connection verified")
+        logger.debug("Database connection verified")
         return True
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,186 @@
+import bisect
+import hashlib
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VNODES = 160
+
+
+def hash_tag(key: str) -> str:
+    """Part of the key used for placement, same rule as Redis Cluster:
+    if the key contains a non-empty {...} section only that part is hashed."""
+    start = key.find("{")
+    if start != -1:
+        end = key.find("}", start + 1)
+        if end > start + 1:
+            return key[start + 1:end]
+    return key
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent-hash ring with virtual nodes. Adding/removing a node only
+    remaps the keys that node owns (~1/N of the keyspace)."""
+
+    def __init__(self, nodes: Optional[List[str]] = None, vnodes: int = DEFAULT_VNODES):
+        self.vnodes = vnodes
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        for node in nodes or []:
+            self.add_node(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(set(self._owners))
+
+    def add_node(self, node: str):
+        if node in self._owners:
+            return
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            idx = bisect.bisect(self._points, point)
+            self._points.insert(idx, point)
+            self._owners.insert(idx, node)
+
+    def remove_node(self, node: str):
+        keep = [(p, o) for p, o in zip(self._points, self._owners) if o != node]
+        self._points = [p for p, _ in keep]
+        self._owners = [o for _, o in keep]
+
+    def get_node(self, key: str) -> str:
+        if not self._points:
+            raise RuntimeError("Hash ring has no nodes")
+        idx = bisect.bisect(self._points, _hash(hash_tag(key))) % len(self._points)
+        return self._owners[idx]
+
+
+class ShardedPipeline:
+    """Buffers commands, runs one pipeline per node and returns results in call order."""
+
+    def __init__(self, sharded: "ShardedRedis"):
+        self._sharded = sharded
+        self._commands: List[Tuple[str, str, tuple, dict]] = []
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def queue(key, *args, **kwargs):
+            self._commands.append((self._sharded.node_for(key), name, (key,) + args, kwargs))
+            return self
+        return queue
+
+    def execute(self) -> list:
+        by_node: Dict[str, List[int]] = {}
+        for idx, (node, _, _, _) in enumerate(self._commands):
+            by_node.setdefault(node, []).append(idx)
+
+        results = [None] * len(self._commands)
+        for node, indexes in by_node.items():
+            pipe = self._sharded.clients[node].pipeline(transaction=False)
+            for idx in indexes:
+                _, name, args, kwargs = self._commands[idx]
+                getattr(pipe, name)(*args, **kwargs)
+            for idx, value in zip(indexes, pipe.execute()):
+                results[idx] = value
+        self._commands = []
+        return results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._commands = []
+
+
+class ShardedRedis:
+    """Client-side sharding over several standalone Redis nodes.
+
+    Single-key commands (get, setex, incr, hget, ...) are routed to the node that
+    owns the key's hash tag; mget/pipeline are split per node and reassembled.
+    xread/xreadgroup are routed by their stream keys, not the first argument."""
+
+    def __init__(self, nodes: List[str], client_factory: Optional[Callable[[str], redis.Redis]] = None,
+                 vnodes: int = DEFAULT_VNODES, **connection_kwargs):
+        self._client_factory = client_factory or (lambda node: _standalone_client(node, **connection_kwargs))
+        self.ring = HashRing(vnodes=vnodes)
+        self.clients: Dict[str, redis.Redis] = {}
+        for node in nodes:
+            self.add_node(node)
+
+    def add_node(self, node: str):
+        if node not in self.clients:
+            self.clients[node] = self._client_factory(node)
+            self.ring.add_node(node)
+            logger.info("Redis ring: added node %s (%d nodes)", node, len(self.clients))
+
+    def remove_node(self, node: str):
+        client = self.clients.pop(node, None)
+        if client is not None:
+            self.ring.remove_node(node)
+            client.close()
+            logger.info("Redis ring: removed node %s (%d nodes)", node, len(self.clients))
+
+    def node_for(self, key: str) -> str:
+        return self.ring.get_node(key)
+
+    def client_for(self, key: str) -> redis.Redis:
+        return self.clients[self.node_for(key)]
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def command(key, *args, **kwargs):
+            return getattr(self.client_for(key), name)(key, *args, **kwargs)
+        return command
+
+    def mget(self, keys: List[str]) -> list:
+        by_node: Dict[str, List[int]] = {}
+        for idx, key in enumerate(keys):
+            by_node.setdefault(self.node_for(key), []).append(idx)
+        results = [None] * len(keys)
+        for node, indexes in by_node.items():
+            values = self.clients[node].mget([keys[idx] for idx in indexes])
+            for idx, value in zip(indexes, values):
+                results[idx] = value
+        return results
+
+    def _client_for_streams(self, streams: dict) -> redis.Redis:
+        nodes = {self.node_for(key) for key in streams}
+        if len(nodes) != 1:
+            raise ValueError("Streams read together must share a {hash tag} (same node)")
+        return self.clients[nodes.pop()]
+
+    def xread(self, streams: dict, *args, **kwargs):
+        return self._client_for_streams(streams).xread(streams, *args, **kwargs)
+
+    def xreadgroup(self, groupname: str, consumername: str, streams: dict, *args, **kwargs):
+        return self._client_for_streams(streams).xreadgroup(groupname, consumername, streams, *args, **kwargs)
+
+    def pipeline(self, transaction: bool = False) -> ShardedPipeline:
+        return ShardedPipeline(self)
+
+    def ping(self) -> bool:
+        return all(client.ping() for client in self.clients.values())
+
+    def close(self):
+        for client in self.clients.values():
+            client.close()
+
+
+def parse_node(node: str) -> Tuple[str, int]:
+    host, _, port = node.strip().rpartition(":")
+    return (host, int(port)) if host else (node.strip(), 6379)
+
+
+def _standalone_client(node: str, **connection_kwargs) -> redis.Redis:
+    host, port = parse_node(node)
+    return redis.Redis(host=host, port=port, **connection_kwargs)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Boolean
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Boolean, Index
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -19,6 +19,10 @@ class URLItem(Base):
 
     short_code = Column(String(10), unique=True, index=True, nullable=True)
 
+    # Integer form of short_code (app.utils.encoding.encode_short_code); NULL for
+    # aliases outside the base36 alphabet. Lookup key when SHORT_CODE_STORAGE=integer.
+    code_id = Column(BigInteger, unique=True, index=True, nullable=True)
+
     original_url = Column(String, index=True, nullable=False, unique=True)
 
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -27,4 +31,28 @@ class URLItem(Base):
 
     click_count = Column(Integer, default=0, index=True)
 
-    is_active = Column(Boolean, default=True)
\ No newline at end of file
+    is_active = Column(Boolean, default=True)
+
+class ClickEvent(Base):
+    """One row per redirect, written in batches by app/workers/click_consumer.py.
+
+    Range-partitioned by month on clicked_at (partitions are created by
+    `python -m app.db.migrate` and the consumer). stream_id is the Redis Stream
+    entry id, so replayed batches are de-duplicated by the primary key."""
+    __tablename__ = "click_events"
+    __table_args__ = (
+        Index("ix_click_events_short_code_clicked_at", "short_code", "clicked_at"),
+        {"postgresql_partition_by": "RANGE (clicked_at)"},
+    )
+
+    stream_id = Column(String(32), primary_key=True)
+
+    clicked_at = Column(DateTime, primary_key=True)
+
+    short_code = Column(String(10), nullable=False)
+
+    referrer = Column(String, nullable=True)
+
+    user_agent = Column(String, nullable=True)
+
+    client_ip = Column(String(45), nullable=True)
@@ -0,0 +1,118 @@
+import logging
+from datetime import date
+
+import redis.exceptions
+from sqlalchemy import select, text
+
+from app.core.logging_config import configure_logging
+from app.db.Connection import database
+from app.db.Models import models
+from app.db.redis_keys import LEGACY_CONFIG_KEY_PREFIX, config_key
+from app.utils.encoding import encode_short_code
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH = 10000
+RATE_LIMIT_CONFIG_NAMES = ("RATE_LIMIT_LIMIT", "RATE_LIMIT_WINDOW")
+
+
+def _month_start(day: date, offset: int = 0) -> date:
+    month = day.month - 1 + offset
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def ensure_click_event_partitions(engine, months_ahead: int = 2, today: date = None):
+    """Monthly partitions of click_events from this month up to `months_ahead`, plus a default one."""
+    if engine.dialect.name != "postgresql":
+        return
+    today = today or date.today()
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE IF NOT EXISTS click_events_default PARTITION OF click_events DEFAULT"))
+        for offset in range(months_ahead + 1):
+            start, end = _month_start(today, offset), _month_start(today, offset + 1)
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS click_events_{start:%Y_%m} PARTITION OF click_events "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            ))
+
+
+def backfill_code_ids(engine) -> int:
+    """Fills urls.code_id for rows created before the column existed, in id order batches."""
+    filled, last_id = 0, 0
+    with engine.connect() as conn:
+        while True:
+            rows = conn.execute(
+                text("SELECT id, short_code FROM urls WHERE id > :last_id AND code_id IS NULL "
+                     "AND short_code IS NOT NULL ORDER BY id LIMIT :limit"),
+                {"last_id": last_id, "limit": BACKFILL_BATCH},
+            ).all()
+            if not rows:
+                return filled
+            updates = [
+                {"row_id": row.id, "code_id": encode_short_code(row.short_code)}
+                for row in rows if encode_short_code(row.short_code) is not None
+            ]
+            if updates:
+                conn.execute(text("UPDATE urls SET code_id = :code_id WHERE id = :row_id"), updates)
+                conn.commit()
+                filled += len(updates)
+            last_id = rows[-1].id
+
+
+def migrate_code_ids(engine):
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE urls ADD COLUMN IF NOT EXISTS code_id BIGINT"))
+    filled = backfill_code_ids(engine)
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            # A failed CONCURRENTLY build leaves an INVALID index behind that IF NOT EXISTS
+            # would keep: it enforces nothing and the planner never uses it
+            valid = conn.execute(text(
+                "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass('ix_urls_code_id')"
+            )).scalar()
+            if valid is False:
+                logger.warning("Index ix_urls_code_id is INVALID (failed build), rebuilding it")
+                conn.execute(text("DROP INDEX CONCURRENTLY IF EXISTS ix_urls_code_id"))
+            conn.execute(text("CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS ix_urls_code_id ON urls (code_id)"))
+    if filled:
+        logger.info("Backfilled code_id for %d urls", filled)
+
+
+def migrate_config_keys(engine, redis_client) -> int:
+    """Copies config stored under the old `config:<name>` keys (or, failing that, the
+    system_configs row) to config_key(name). Values already set there are kept."""
+    with engine.connect() as conn:
+        saved = dict(conn.execute(select(models.SystemConfig.key, models.SystemConfig.value)).all())
+    migrated = 0
+    for name in sorted(set(saved) | set(RATE_LIMIT_CONFIG_NAMES)):
+        value = redis_client.get(f"{LEGACY_CONFIG_KEY_PREFIX}{name}") or saved.get(name)
+        if value is not None and redis_client.set(config_key(name), value, nx=True):
+            migrated += 1
+    return migrated
+
+
+def run_migrations():
+    engine = database.get_engine()
+    models.Base.metadata.create_all(bind=engine)
+    migrate_code_ids(engine)
+    ensure_click_event_partitions(engine)
+    logger.info("Database models initialized/checked.")
+    try:
+        migrated = migrate_config_keys(engine, database.get_redis())
+        if migrated:
+            logger.info("Copied %d config value(s) to %s* keys", migrated, config_key(""))
+    except redis.exceptions.RedisError:
+        logger.warning("Redis unavailable, config keys not migrated; re-run app.db.migrate")
+
+
+def main():
+    configure_logging()
+    try:
+        run_migrations()
+    finally:
+        database.close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+# Redis key layout. Keys that are read together share a {hash tag} so that
+# Redis Cluster and the client-side ring (redis_ring.hash_tag) place them on
+# the same node; independent keys are left untagged so they spread evenly.
+
+URL_KEY_PREFIX = "url:"
+URL_BUCKET_KEY_PREFIX = "urlb:"
+RATE_LIMIT_KEY_PREFIX = "rate_limit:"
+CONFIG_KEY_PREFIX = "{config}:"
+LEGACY_CONFIG_KEY_PREFIX = "config:"  # before the {config} hash tag; copied over by app.db.migrate
+CLICK_STREAM_KEY = "clicks"
+CLICK_STREAM_GROUP = "click-writers"
+
+
+def url_key(short_code: str) -> str:
+    return f"{URL_KEY_PREFIX}{short_code}"
+
+
+def url_bucket_key(bucket: int) -> str:
+    return f"{URL_BUCKET_KEY_PREFIX}{bucket}"
+
+
+def rate_limit_key(client_ip: str) -> str:
+    return f"{RATE_LIMIT_KEY_PREFIX}{client_ip}"
+
+
+def config_key(name: str) -> str:
+    return f"{CONFIG_KEY_PREFIX}{name}"
@@ -1,71 +1,120 @@
-from typing import Optional
+from typing import List, Optional
+from sqlalchemy import or_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
 from datetime import datetime
 import logging
-from app.utils.encoding import  generate_short_code, normalize_short_code
+from app.core.config import settings
+from app.utils.encoding import  generate_short_code, normalize_short_code, encode_short_code
 
 from app.db.Models.models import URLItem
 
 logger = logging.getLogger(__name__)
 
 
+def _integer_storage() -> bool:
+    return settings.SHORT_CODE_STORAGE.lower() == "integer"
+
+def _code_id_fallback(normalized: str) -> bool:
+    return settings.CODE_ID_FALLBACK and _integer_storage() and encode_short_code(normalized) is not None
+
+def _short_code_filter(normalized: str):
+    if _integer_storage():
+        code_id = encode_short_code(normalized)
+        if code_id is not None:
+            return URLItem.code_id == code_id
+    return URLItem.short_code == normalized
+
+def _missing_code_id_filter(normalized: str):
+    # Rows written before code_id existed (or by old instances mid-rollout) until the
+    # backfill in app.db.migrate reaches them; only queried after a code_id miss
+    return (URLItem.code_id.is_(None)) & (URLItem.short_code == normalized)
+
 def get_url_by_short_code(db: Session, short_code: str) -> Optional[URLItem]:
     normalized = normalize_short_code(short_code)
-    return db.query(URLItem).filter(URLItem.short_code == normalized).first()
+    db_url = db.query(URLItem).filter(_short_code_filter(normalized)).first()
+    if db_url is None and _code_id_fallback(normalized):
+        db_url = db.query(URLItem).filter(_missing_code_id_filter(normalized)).first()
+    return db_url
+
+def get_urls_by_short_codes(db: Session, short_codes: List[str]) -> List[URLItem]:
+    if not short_codes:
+        return []
+    if not _integer_storage():
+        return db.query(URLItem).filter(URLItem.short_code.in_(short_codes)).all()
+    code_ids = [encode_short_code(code) for code in short_codes]
+    conditions = []
+    if any(code_id is not None for code_id in code_ids):
+        conditions.append(URLItem.code_id.in_([code_id for code_id in code_ids if code_id is not None]))
+    aliases = [code for code, code_id in zip(short_codes, code_ids) if code_id is None]
+    if aliases:
+        conditions.append(URLItem.short_code.in_(aliases))
+    db_urls = db.query(URLItem).filter(or_(*conditions)).all()
+    found = {db_url.short_code for db_url in db_urls}
+    missing = [code for code in short_codes if code not in found and _code_id_fallback(code)]
+    if missing:
+        db_urls += db.query(URLItem).filter(URLItem.code_id.is_(None), URLItem.short_code.in_(missing)).all()
+    return db_urls
 
 def get_url_by_original(db: Session, original_url: str) -> Optional[URLItem]:
     return db.query(URLItem).filter(URLItem.original_url == original_url).first()
 
 
-def _commit_and_refresh(db: Session, db_url: URLItem) -> URLItem:
-    try:
-        db.add(db_url)
-        db.commit()
-        db.refresh(db_url)
-        return db_url
-    except IntegrityError as e:
-        db.rollback()
-        logger.warning(
-            "IntegrityError creating URLItem short_code=%s original=%s: %s",
-            db_url.short_code, db_url.original_url, str(e)
-        )
-        raise
+def _insert(db: Session):
+    # Dialect-specific INSERT for ON CONFLICT (Postgres in production, SQLite in the tests)
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+def _execute_insert(db: Session, stmt) -> Optional[URLItem]:
+    """Runs one INSERT ... RETURNING and commits; None when ON CONFLICT DO NOTHING skipped it."""
+    db_url = db.scalars(stmt.returning(URLItem), execution_options={"populate_existing": True}).first()
+    if db_url is not None:
+        # Keep the RETURNING values instead of reloading the expired row after commit
+        db.expunge(db_url)
+    db.commit()
+    return db_url
 
 def _create_with_custom_code(db: Session, short_code: str, original_url: str) -> URLItem:
     normalized = normalize_short_code(short_code)
-    db_url = URLItem(short_code=normalized, original_url=original_url)
-    try:
-        return _commit_and_refresh(db, db_url)
-    except IntegrityError:
-        raise ValueError("Custom alias already exists")
+    stmt = _insert(db)(URLItem).values(
+        short_code=normalized, code_id=encode_short_code(normalized), original_url=original_url
+    ).on_conflict_do_nothing()
+    db_url = _execute_insert(db, stmt)
+    if db_url is not None:
+        return db_url
+
+    # Conflict path only: find out which unique column was taken
+    existing = db.query(URLItem).filter(
+        or_(_short_code_filter(normalized), URLItem.original_url == original_url)
+    ).all()
+    for db_url in existing:
+        if db_url.short_code == normalized and db_url.original_url == original_url:
+            return db_url  # same request repeated
+    logger.warning("Custom alias conflict for '%s' -> %.50s", normalized, original_url)
+    if any(db_url.original_url == original_url for db_url in existing):
+        raise ValueError("URL already exists with a different short code")
+    raise ValueError("Custom alias already exists")
 
 def _create_and_generate_code(db: Session, original_url: str) -> URLItem:
     max_retries = 5
-    
+
     for attempt in range(max_retries):
         short_code = generate_short_code()
-        db_url = URLItem(short_code=short_code, original_url=original_url)
-        
-        try:
-            return _commit_and_refresh(db, db_url)
-        except IntegrityError as e:
-            db.rollback()
-            error_msg = str(e.orig).lower() if hasattr(e, 'orig') else str(e).lower()
-            
-            if "short_code" in error_msg or "unique" in error_msg:
-                existing = get_url_by_original(db, original_url)
-                if existing:
-                    return existing
-                logger.info(f"Short code collision on attempt {attempt + 1}/{max_retries}")
-            elif "original_url" in error_msg:
-                existing = get_url_by_original(db, original_url)
-                if existing:
-                    return existing
-                raise ValueError("Failed to create URLItem")
-            else:
-                raise ValueError("Failed to create URLItem")
-    
+        # DO NOTHING rather than a no-op DO UPDATE: a repeated URL must not rewrite its
+        # row (new tuple version, WAL, row lock) just so RETURNING yields it
+        stmt = _insert(db)(URLItem).values(
+            short_code=short_code, code_id=encode_short_code(short_code), original_url=original_url
+        ).on_conflict_do_nothing()
+        db_url = _execute_insert(db, stmt)
+        if db_url is not None:
+            return db_url
+
+        # Conflict path only: the URL is already shortened (maybe by a concurrent
+        # request), otherwise the generated code collided and is retried
+        db_url = get_url_by_original(db, original_url)
+        if db_url is not None:
+            return db_url
+        logger.info("Short code collision on attempt %d/%d", attempt + 1, max_retries)
+
     raise ValueError(f"Failed to generate unique short code after {max_retries} attempts")
 
 def create_url(db: Session, short_code: Optional[str], original_url: str) -> URLItem:
@@ -75,9 +124,12 @@ def create_url(db: Session, short_code: Optional[str], original_url: str) -> URL
 
 def increment_click(db: Session, short_code: str) -> int:
     normalized = normalize_short_code(short_code)
-    updated = db.query(URLItem).filter(URLItem.short_code == normalized).update({
+    values = {
         URLItem.click_count: URLItem.click_count + 1,
         URLItem.last_accessed_at: datetime.utcnow()
-    })
+    }
+    updated = db.query(URLItem).filter(_short_code_filter(normalized)).update(values)
+    if not updated and _code_id_fallback(normalized):
+        updated = db.query(URLItem).filter(_missing_code_id_filter(normalized)).update(values)
     db.commit()
     return updated
\ No newline at end of file
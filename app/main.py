@@ -3,62 +3,129 @@ from fastapi import FastAPI, Request, status, Depends, HTTPException, Background
 from fastapi.responses import JSONResponse, RedirectResponse
 import redis.exceptions
 import logging
-import signal, sys
+import time
+from contextlib import asynccontextmanager
 
 from app.core.config import settings
 from app.db.Models import models  
 from app.api import shortener, admin
-from app.core.logging_config import configure_logging 
+from app.core.logging_config import configure_logging, log_stats, start_log_listener, stop_log_listener
 from app.services.shortener import URLService
-from app.services import metrics
+from app.services import metrics, snapshot
+from app.services.health import health_monitor
+from app.core.circuit_breaker import redis_breaker_stats, db_breaker
+from app.core.admission import admission_controller
 from sqlalchemy.orm import Session
 from app.RateLimitHelper import *
+from app.db.redis_keys import rate_limit_key
 
-logger = configure_logging()
-logger.info(f"Application '{settings.PROJECT_NAME}' starting up.")
+logger = logging.getLogger("app")
 
-models.Base.metadata.create_all(bind=database.engine)
-logger.info("Database models initialized/checked.")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs inside each worker after fork, so pools are never shared between processes.
+    # Schema is managed separately with `python -m app.db.migrate`.
+    start_log_listener()
+    logger.info("Application '%s' starting up.", settings.PROJECT_NAME)
+    database.init_connections()
+    if not settings.SNAPSHOT_AUTHORITATIVE:
+        health_monitor.start()
+    yield
+    logger.info("Shutting down gracefully...")
+    health_monitor.stop()
+    database.close_connections()
+    stop_log_listener()
+
+
+def snapshot_health_check():
+    # Snapshot-only node: healthy as long as a snapshot is mapped, Redis/DB are not used
+    snapshot_stats = snapshot.stats()
+    health_status = {
+        "status": "healthy" if snapshot_stats else "unhealthy",
+        "service": "url-shortener",
+        "database": "unused",
+        "redis": "unused",
+        "snapshot": snapshot_stats,
+        "admission": admission_controller.stats(),
+        "logging": log_stats(),
+    }
+    return JSONResponse(content=health_status, status_code=200 if snapshot_stats else 503)
 
-app = FastAPI(
-    title=settings.PROJECT_NAME, 
-    description="URL Shortener Service"
-)
 
-@app.get("/health", tags=["health"])
 def health_check():
+    if settings.SNAPSHOT_AUTHORITATIVE:
+        return snapshot_health_check()
     health_status = {
         "status": "healthy",
         "service": "url-shortener",
         "database": "healthy",
         "redis" : "healthy"
     }
-    is_db_healthy = database.verify_database_connection()
-    if not is_db_healthy:
+    # Cached by the background monitor; no live DB/Redis round trip per call
+    checked = health_monitor.status()
+    if not checked["database"]:
         health_status["database"] = "degraded"
     
-    redis_healthy=  database.verify_redis_connection()
-    if not redis_healthy:
+    if not checked["redis"]:
         health_status["redis"] = "degraded"
+
+    health_status["checked_at"] = checked["checked_at"]
+    health_status["circuit_breakers"] = {
+        "redis": redis_breaker_stats(),
+        "database": db_breaker.stats(),
+    }
+    health_status["admission"] = admission_controller.stats()
+    health_status["logging"] = log_stats()
+    if settings.CLICK_STREAM_ENABLED:
+        health_status["click_stream"] = {"dropped": metrics.dropped_clicks()}
     
     status_code = 200 if health_status["database"] == "healthy" else 503
     return JSONResponse(content=health_status, status_code=status_code)
 
 
-app.include_router(shortener.router, prefix="")
-app.include_router(admin.router, prefix="")
+async def request_timing_middleware(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if settings.SLOW_REQUEST_THRESHOLD_MS and elapsed_ms >= settings.SLOW_REQUEST_THRESHOLD_MS:
+        logger.warning(
+            "Slow request: %s %s -> %s in %.1f ms",
+            request.method, request.url.path, response.status_code, elapsed_ms
+        )
+    return response
+
+
+async def admission_middleware(request: Request, call_next):
+    admission_class = admission_controller.classify(request.method, request.url.path)
+    if admission_class is None or not settings.ADMISSION_CONTROL_ENABLED:
+        return await call_next(request)
+
+    if not await admission_controller.acquire(admission_class):
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"Retry-After": "1"},
+            content={"detail": "Server is overloaded, please retry."}
+        )
+    start = time.perf_counter()
+    try:
+        return await call_next(request)
+    finally:
+        admission_controller.release(admission_class, (time.perf_counter() - start) * 1000)
+
 
-@app.middleware("http")
 async def rate_limit_middleware(request: Request, call_next):
     if  is_admin_path(request.url.path) or request.url.path == "/health":
         return await call_next(request)
 
-    limit, window = get_rate_limit_config(database)
     client_ip = get_client_ip(request)
-    key = f"rate_limit:{client_ip}"
-
-    allowed = check_rate_limit(database, key, limit, window)
+    key = rate_limit_key(client_ip)
+    if settings.SNAPSHOT_AUTHORITATIVE:
+        limit, window = RATE_LIMIT_DEFAULT_LIMIT, RATE_LIMIT_DEFAULT_WINDOW
+        allowed = check_local_rate_limit(key, limit, window)
+    else:
+        limit, window = get_rate_limit_config(database)
+        allowed = check_rate_limit(database, key, limit, window)
     if allowed is False:
         return JSONResponse(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
@@ -69,23 +136,36 @@ async def rate_limit_middleware(request: Request, call_next):
 
     return await call_next(request)
 
-@app.exception_handler(Exception)
+async def database_unavailable_handler(request: Request, exc: database.DatabaseUnavailable):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(max(1, round(settings.CIRCUIT_RESET_TIMEOUT)))},
+        content={"detail": "Service temporarily unavailable"},
+    )
+
 async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"Unhandled exception: {exc}", exc_info=True)
+    logger.error("Unhandled exception: %s", exc, exc_info=True)
     return JSONResponse(status_code=500, content={"detail": "Internal server error"})
 
-def _shutdown(signum, frame):
-    logger.info("Shutting down gracefully...")
-    try:
-        database.engine.dispose()
-    except Exception:
-        logger.debug("Error disposing DB engine")
-    try:
-        database.redis_client.close()
-    except Exception:
-        logger.debug("Error closing Redis client")
-    sys.exit(0)
-
 
-signal.signal(signal.SIGTERM, _shutdown)
-signal.signal(signal.SIGINT, _shutdown)
+def create_app() -> FastAPI:
+    configure_logging()
+    app = FastAPI(
+        title=settings.PROJECT_NAME, 
+        description="URL Shortener Service",
+        lifespan=lifespan,
+    )
+    app.add_api_route("/health", health_check, methods=["GET"], tags=["health"])
+    app.include_router(shortener.router, prefix="")
+    app.include_router(admin.router, prefix="")
+    app.middleware("http")(rate_limit_middleware)
+    # Shed before spending a Redis round trip on rate limiting
+    app.middleware("http")(admission_middleware)
+    # Registered last so it is outermost and includes rate limiting
+    app.middleware("http")(request_timing_middleware)
+    app.add_exception_handler(database.DatabaseUnavailable, database_unavailable_handler)
+    app.add_exception_handler(Exception, global_exception_handler)
+    return app
+
+
+app = create_app()
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import List
+from app.core.config import settings
+
+# Request DTOs
+class ResolveRequest(BaseModel):
+    short_codes: List[str] = Field(..., min_length=1)
+    include_metadata: bool = False
+
+    @field_validator('short_codes')
+    def validate_short_codes(cls, v):
+        if len(v) > settings.RESOLVE_MAX_CODES:
+            raise ValueError(f'at most {settings.RESOLVE_MAX_CODES} short_codes per request')
+        if any(len(code) > 10 for code in v):
+            raise ValueError('short codes must be 10 characters or less')
+        return v
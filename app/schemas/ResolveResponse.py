@@ -0,0 +1,22 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Optional, List
+
+# Response DTOs
+class ResolvedURL(BaseModel):
+    short_code: str
+    found: bool
+    # original_url is the Python field, 'url' is the JSON key
+    original_url: Optional[str] = Field(None, alias="url")
+    short_url: Optional[str] = None
+    # Only with include_metadata (read from the database, not the cache)
+    created_at: Optional[datetime] = None
+    last_accessed_at: Optional[datetime] = None
+    click_count: Optional[int] = None
+    is_active: Optional[bool] = None
+
+    model_config = {"populate_by_name": True}
+
+
+class ResolveResponse(BaseModel):
+    results: List[ResolvedURL]
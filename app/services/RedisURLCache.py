@@ -1,22 +1,82 @@
 from urllib.request import Request
 import logging
+import random
+from typing import Dict, List
 import redis.exceptions
 from app.db.Connection import database
 from app.db.Models.models import URLItem
+from app.core.config import settings
+from app.db.redis_keys import url_key, url_bucket_key
+from app.services import snapshot
+from app.utils.cache_encoding import bucket_for, encode_entry, decode_entry, is_expired
 from app.utils.encoding import normalize_short_code
 
 logger = logging.getLogger(__name__)
 CACHE_TTL = 86400
+COMPACT = settings.CACHE_LAYOUT.lower() == "compact"
+
+
+def _bucket_key(code: str) -> str:
+    return url_bucket_key(bucket_for(code, settings.CACHE_COMPACT_BUCKETS))
+
+
+def _compact_entry(original_url: str) -> str:
+    return encode_entry(original_url, CACHE_TTL, settings.CACHE_COMPRESS_MIN_LENGTH)
+
+
+def _compact_decode(code: str, entry):
+    if not entry:
+        return None
+    url = decode_entry(entry)
+    if url is None:
+        # Expired field: the bucket key itself outlives individual links
+        database.get_redis().hdel(_bucket_key(code), code)
+    return url
+
+def _put_compact(buckets: Dict[str, Dict[str, str]]):
+    """Writes {bucket: {code: entry}}. NX gives a new bucket its TTL and GT extends it to
+    cover the newest entry, so buckets do not expire while holding fresh links. Expired
+    fields are dropped when read; a sampled CACHE_COMPACT_SWEEP_RATE of writes also
+    sweeps the bucket, for links that are never read again."""
+    redis_client = database.get_redis()
+    pipe = redis_client.pipeline(transaction=False)
+    for bucket, fields in buckets.items():
+        pipe.hset(bucket, mapping=fields)
+        pipe.expire(bucket, CACHE_TTL, nx=True)
+        pipe.expire(bucket, CACHE_TTL, gt=True)
+    swept = [bucket for bucket in buckets if random.random() < settings.CACHE_COMPACT_SWEEP_RATE]
+    for bucket in swept:
+        pipe.hgetall(bucket)
+    results = pipe.execute()
+    if swept:
+        _sweep(redis_client, zip(swept, results[-len(swept):]))
+
+def _sweep(redis_client, buckets):
+    pipe, stale = redis_client.pipeline(transaction=False), 0
+    for bucket, current in buckets:
+        expired = [field for field, entry in (current or {}).items() if is_expired(entry)]
+        if expired:
+            pipe.hdel(bucket, *expired)
+            stale += 1
+    if stale:
+        pipe.execute()
 
 @staticmethod
 def get(short_code: str, request: Request):
     normalized = normalize_short_code(short_code)
-    cache_key = f"url:{normalized}"
+    cache_key = url_key(normalized)
+
+    snapshot_url = snapshot.lookup(normalized)
+    if snapshot_url or settings.SNAPSHOT_AUTHORITATIVE:
+        return snapshot_url
     
     try:
-        cached_url = database.redis_client.get(cache_key)
+        if COMPACT:
+            cached_url = _compact_decode(normalized, database.get_redis().hget(_bucket_key(normalized), normalized))
+        else:
+            cached_url = database.get_redis().get(cache_key)
     except redis.exceptions.ConnectionError:
-        logger.warning(f"Redis connection failed for {short_code}")
+        logger.warning("Redis connection failed for %s", short_code)
         return None
     
     if cached_url:
@@ -25,7 +85,7 @@ def get(short_code: str, request: Request):
         except Exception:
             cached_decoded = str(cached_url)
 
-        logger.info(f"Redirect cache HIT for {short_code} -> {cached_decoded}")
+        logger.debug("Redirect cache HIT for %s -> %s", short_code, cached_decoded)
         return cached_decoded
     
     return None
@@ -33,10 +93,60 @@ def get(short_code: str, request: Request):
 @staticmethod
 def put(short_code: str, db_url: URLItem):
     normalized = normalize_short_code(short_code)
-    cache_key = f"url:{normalized}"
+    cache_key = url_key(normalized)
     
     try:
-        database.redis_client.setex(cache_key, CACHE_TTL, db_url.original_url)
-        logger.debug(f"Cached {short_code} -> {db_url.original_url[:50]}")
+        if COMPACT:
+            _put_compact({_bucket_key(normalized): {normalized: _compact_entry(db_url.original_url)}})
+        else:
+            database.get_redis().setex(cache_key, CACHE_TTL, db_url.original_url)
+        logger.debug("Cached %s -> %.50s", short_code, db_url.original_url)
+    except redis.exceptions.ConnectionError:
+        logger.warning("Failed to cache %s, Redis unavailable", short_code)
+
+def get_many(short_codes: List[str]) -> Dict[str, str]:
+    """Snapshot first, then a single MGET (or one HGET pipeline in the compact
+    layout) for a batch of normalized codes; returns only the hits."""
+    if not short_codes:
+        return {}
+    hits = {}
+    if settings.SNAPSHOT_DIR:
+        for code in short_codes:
+            url = snapshot.lookup(code)
+            if url:
+                hits[code] = url
+        short_codes = [code for code in short_codes if code not in hits]
+        if not short_codes or settings.SNAPSHOT_AUTHORITATIVE:
+            return hits
+    try:
+        if COMPACT:
+            pipe = database.get_redis().pipeline(transaction=False)
+            for code in short_codes:
+                pipe.hget(_bucket_key(code), code)
+            values = [_compact_decode(code, entry) for code, entry in zip(short_codes, pipe.execute())]
+        else:
+            values = database.get_redis().mget([url_key(code) for code in short_codes])
+    except redis.exceptions.ConnectionError:
+        logger.warning("Redis connection failed for batch of %d codes", len(short_codes))
+        return hits
+    hits.update((code, value) for code, value in zip(short_codes, values) if value)
+    return hits
+
+def put_many(db_urls: List[URLItem]):
+    """Backfill several entries in one pipeline round trip."""
+    if not db_urls:
+        return
+    try:
+        if COMPACT:
+            buckets = {}
+            for db_url in db_urls:
+                normalized = normalize_short_code(db_url.short_code)
+                buckets.setdefault(_bucket_key(normalized), {})[normalized] = _compact_entry(db_url.original_url)
+            _put_compact(buckets)
+        else:
+            pipe = database.get_redis().pipeline(transaction=False)
+            for db_url in db_urls:
+                pipe.setex(url_key(normalize_short_code(db_url.short_code)), CACHE_TTL, db_url.original_url)
+            pipe.execute()
     except redis.exceptions.ConnectionError:
-        logger.warning(f"Failed to cache {short_code}, Redis unavailable")
\ No newline at end of file
+        logger.warning("Failed to cache batch of %d codes, Redis unavailable", len(db_urls))
@@ -1,6 +1,7 @@
 from datetime import datetime
 from app.db.Connection import database
 from app.db.Models import models
+from app.db.redis_keys import config_key
 from app.schemas.ConfigUpdate import ConfigUpdate
 from fastapi import  Depends
 from sqlalchemy.orm import Session
@@ -21,4 +22,4 @@ class ConfigService:
         db.refresh(db_config)
 
     def save_to_redis(config: ConfigUpdate, db: Session):
-        database.redis_client.set(f"config:{config.key}", config.value)
\ No newline at end of file
+        database.get_redis().set(config_key(config.key), config.value)
\ No newline at end of file
@@ -0,0 +1,56 @@
+import logging
+import threading
+import time
+
+from app.core.circuit_breaker import db_breaker
+from app.core.config import settings
+from app.db.Connection import database
+
+logger = logging.getLogger(__name__)
+
+
+class HealthMonitor:
+    """Probes DB and Redis in a background thread (one per worker) and caches
+    the result for /health; probe results also drive the circuit breakers."""
+
+    def __init__(self, interval: float = None):
+        self.interval = interval or settings.HEALTH_CHECK_INTERVAL
+        self._status = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def check_now(self) -> dict:
+        db_ok = database.verify_database_connection()
+        # Feeds each Redis node's breaker itself (one breaker per node in ring/cluster mode)
+        redis_ok = database.verify_redis_connection()
+        db_breaker.record_probe(db_ok)
+        self._status = {"database": db_ok, "redis": redis_ok, "checked_at": time.time()}
+        return self._status
+
+    def status(self) -> dict:
+        # Without a running monitor (e.g. no lifespan) fall back to a live check
+        return self._status or self.check_now()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.check_now()
+            except Exception:
+                logger.exception("Health monitor probe failed")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="health-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+
+
+health_monitor = HealthMonitor()
@@ -1,23 +1,79 @@
 from app.db.Connection import database
 from app.db import repository
+from app.db.redis_keys import CLICK_STREAM_KEY
+from app.core.config import settings
+from app.RateLimitHelper import get_client_ip
+from app.utils.encoding import normalize_short_code
 from datetime import datetime
+import ipaddress
 import logging
+import threading
+import redis.exceptions
 
 logger = logging.getLogger(__name__)
 
 
 def record_click(short_code: str):
-        db = database.SessionLocal()
+        db = database.new_session()
         try:
                 updated = repository.increment_click(db, short_code)
                 if updated:
-                        logger.info("metrics.record_click: DB counters updated for %s", short_code)
+                        logger.debug("metrics.record_click: DB counters updated for %s", short_code)
         except Exception:
                 logger.exception("metrics.record_click: failed to update DB for %s", short_code)
         finally:
                 db.close()
 
+MAX_HEADER_LENGTH = 512
+
+
+def click_event(request, short_code: str) -> dict:
+    # Compact field names; the timestamp is the stream entry id
+    event = {"c": normalize_short_code(short_code)}
+    client_ip = get_client_ip(request)
+    referrer = request.headers.get("referer")
+    user_agent = request.headers.get("user-agent")
+    if client_ip:
+        try:
+            # X-Forwarded-For is client controlled; click_events.client_ip is VARCHAR(45)
+            event["ip"] = str(ipaddress.ip_address(client_ip))
+        except ValueError:
+            pass
+    if referrer:
+        event["r"] = referrer[:MAX_HEADER_LENGTH]
+    if user_agent:
+        event["ua"] = user_agent[:MAX_HEADER_LENGTH]
+    return event
+
+
+_dropped_clicks = 0
+_dropped_lock = threading.Lock()
+
+
+def dropped_clicks() -> int:
+    return _dropped_clicks
+
+
+def publish_click(event: dict):
+    global _dropped_clicks
+    try:
+        database.get_redis().xadd(
+            CLICK_STREAM_KEY, event, maxlen=settings.CLICK_STREAM_MAXLEN, approximate=True
+        )
+    except (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError):
+        # Never fall back to a DB write per redirect: Redis being down is exactly when
+        # the DB has to be spared. The click is lost and counted in /health.
+        with _dropped_lock:
+            _dropped_clicks += 1
+        logger.debug("metrics.publish_click: stream unavailable, dropped click for %s", event["c"])
+
 def update_stat(request ,background_tasks, short_code):
+    if settings.SNAPSHOT_AUTHORITATIVE:
+        # Snapshot-only nodes have no Redis/DB to record clicks in
+        return
     if not getattr(request.state, "metrics_scheduled", False):
-        background_tasks.add_task(record_click, short_code)
+        if settings.CLICK_STREAM_ENABLED:
+            background_tasks.add_task(publish_click, click_event(request, short_code))
+        else:
+            background_tasks.add_task(record_click, short_code)
         request.state.metrics_scheduled = True
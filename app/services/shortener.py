@@ -1,10 +1,11 @@
 from urllib.request import Request
+from app.core.config import settings
 from app.db.Connection import database
 from app.services import metrics
 from sqlalchemy.orm import Session
 from app.db.Models.models import URLItem
 from app.db import repository
-from typing import Optional
+from typing import Dict, List, Optional
 import logging
 from app.services import RedisURLCache
 from app.utils.encoding import normalize_short_code
@@ -15,35 +16,11 @@ logger = logging.getLogger(__name__)
 
 class URLService:
 
-    @staticmethod
-    def validate_custom_alias(db: Session, custom_alias: Optional[str]):
-        if not custom_alias:
-            return None
-        # Check if normalized version exists (case-insensitive)
-        normalized = normalize_short_code(custom_alias)
-        if repository.get_url_by_short_code(db, normalized):
-            logger.warning(f"Custom alias collision (case-insensitive): '{custom_alias}' → '{normalized}'")
-            raise ValueError("Custom alias already exists")
-        
-        return custom_alias
-
     @staticmethod
     def create_short_url(db: Session, original_url: str, custom_alias: Optional[str]) -> URLItem:
-        # Validate custom alias if provided
-        alias = URLService.validate_custom_alias(db, custom_alias)
-        if alias:
-            url_item = repository.create_url(db, alias, original_url)
-            RedisURLCache.put(alias, url_item)
-            return url_item
-
-        # Idempotency: return existing mapping if present
-        existing = repository.get_url_by_original(db, original_url)
-        if existing:
-            logger.info("short URL already existed : '%s' for URL: %s", existing.short_code, original_url[:50])
-            return existing
-
-        # Let repository.create_url generate the short_code from DB id
-        url_item = repository.create_url(db, alias, original_url)
+        # One INSERT ... ON CONFLICT ... RETURNING: alias collisions and repeated
+        # URLs are resolved by the database, not by a check-then-insert
+        url_item = repository.create_url(db, custom_alias, original_url)
         RedisURLCache.put(url_item.short_code, url_item)
         return url_item
 
@@ -56,4 +33,22 @@ class URLService:
         long_url = repository.get_url_by_short_code(db, short_code)
         if long_url:
             RedisURLCache.put(short_code, long_url)
-            return long_url
\ No newline at end of file
+            return long_url
+
+    @staticmethod
+    def resolve_many(db: Session, short_codes: List[str]) -> Dict[str, str]:
+        # Read-only lookup for previews/crawlers: no click is recorded.
+        codes = list(dict.fromkeys(normalize_short_code(code) for code in short_codes))
+        resolved = RedisURLCache.get_many(codes)
+        misses = [code for code in codes if code not in resolved]
+        if misses and not settings.SNAPSHOT_AUTHORITATIVE:
+            db_urls = repository.get_urls_by_short_codes(db, misses)
+            RedisURLCache.put_many(db_urls)
+            resolved.update({db_url.short_code: db_url.original_url for db_url in db_urls})
+        return resolved
+
+    @staticmethod
+    def resolve_many_with_metadata(db: Session, short_codes: List[str]) -> Dict[str, URLItem]:
+        # Metadata only lives in the database: one batch query, the cache is skipped
+        codes = list(dict.fromkeys(normalize_short_code(code) for code in short_codes))
+        return {db_url.short_code: db_url for db_url in repository.get_urls_by_short_codes(db, codes)}
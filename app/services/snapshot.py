@@ -0,0 +1,218 @@
+"""Read-only, memory-mapped redirect snapshot (short_code -> original_url).
+
+File layout (little endian):
+
+    header   MAGIC(8s) base_id(Q) cursor_ms(Q) count(Q)
+    keys     count x KEY_SIZE bytes, short codes NUL-padded, sorted bytewise
+    offsets  (count + 1) x Q, start of each URL inside data (end = next offset)
+    data     concatenated UTF-8 URLs; an empty URL is a tombstone (delta files only)
+
+A snapshot directory holds one `base.snap` plus `delta-<base_id>-<seq>.snap` files
+built by app/tools/build_snapshot.py. Files are replaced atomically (os.replace);
+the resolver re-checks the directory every SNAPSHOT_REFRESH_SECONDS and maps new
+files without a restart. Lookups binary-search the mapping directly, so no
+per-entry Python objects are ever built.
+"""
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+from typing import Iterable, Iterator, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"URLSNAP1"
+HEADER = struct.Struct("<8sQQQ")
+OFFSET = struct.Struct("<Q")
+OFFSET_PAIR = struct.Struct("<QQ")
+KEY_SIZE = 10
+BASE_NAME = "base.snap"
+DELTA_PATTERN = re.compile(r"^delta-(\d+)-(\d+)\.snap$")
+
+TOMBSTONE = object()
+
+
+def encode_key(short_code: str) -> Optional[bytes]:
+    key = short_code.encode()
+    if len(key) > KEY_SIZE:
+        return None
+    return key.ljust(KEY_SIZE, b"\0")
+
+
+def write_snapshot(path: str, rows: Iterable[Tuple[str, Optional[str]]], base_id: int, cursor_ms: int) -> int:
+    """Writes (short_code, url) rows sorted by short_code; url None is a tombstone.
+    The file appears atomically at `path`. Returns the number of entries written."""
+    directory = os.path.dirname(path) or "."
+    count, position, previous = 0, 0, None
+    with tempfile.TemporaryFile() as keys, tempfile.TemporaryFile() as offsets, tempfile.TemporaryFile() as data:
+        for short_code, url in rows:
+            key = encode_key(short_code)
+            if key is None:
+                logger.warning("Snapshot: skipping short code that does not fit %d bytes: %r", KEY_SIZE, short_code)
+                continue
+            if previous is not None and key <= previous:
+                raise ValueError(f"Snapshot rows must be sorted and unique, got {short_code!r} after {previous!r}")
+            payload = url.encode() if url else b""
+            keys.write(key)
+            offsets.write(OFFSET.pack(position))
+            data.write(payload)
+            position += len(payload)
+            count += 1
+            previous = key
+        offsets.write(OFFSET.pack(position))
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(HEADER.pack(MAGIC, base_id, cursor_ms, count))
+                for spool in (keys, offsets, data):
+                    spool.seek(0)
+                    while chunk := spool.read(1 << 20):
+                        out.write(chunk)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+    return count
+
+
+class SnapshotFile:
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.identity = (stat.st_ino, stat.st_mtime_ns)
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # Slicing a memoryview does not copy; slicing the mmap would allocate per probe
+        self._view = memoryview(self._mm)
+        magic, self.base_id, self.cursor_ms, self.count = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a redirect snapshot")
+        self._keys = HEADER.size
+        self._offsets = self._keys + self.count * KEY_SIZE
+        self._data = self._offsets + (self.count + 1) * OFFSET.size
+
+    def find(self, key: bytes):
+        """URL for the padded key, TOMBSTONE if deleted, None if absent."""
+        view, keys = self._view, self._keys
+        # Big-endian integers of equal width order like the bytes (memoryviews only support ==)
+        target = int.from_bytes(key, "big")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = keys + mid * KEY_SIZE
+            if int.from_bytes(view[start:start + KEY_SIZE], "big") < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        start = keys + lo * KEY_SIZE
+        if lo == self.count or view[start:start + KEY_SIZE] != key:
+            return None
+        begin, end = OFFSET_PAIR.unpack_from(view, self._offsets + lo * OFFSET.size)
+        if begin == end:
+            return TOMBSTONE
+        return str(view[self._data + begin:self._data + end], "utf-8")
+
+    def entries(self) -> Iterator[Tuple[str, Optional[str]]]:
+        """(short_code, url) in key order, url None for a tombstone (used to merge deltas)."""
+        view = self._view
+        for i in range(self.count):
+            start = self._keys + i * KEY_SIZE
+            begin, end = OFFSET_PAIR.unpack_from(view, self._offsets + i * OFFSET.size)
+            yield (bytes(view[start:start + KEY_SIZE]).rstrip(b"\0").decode(),
+                   str(view[self._data + begin:self._data + end], "utf-8") or None)
+
+
+class SnapshotResolver:
+    def __init__(self, directory: str, refresh_seconds: float = None):
+        self.directory = directory
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else settings.SNAPSHOT_REFRESH_SECONDS
+        self._files: Tuple[SnapshotFile, ...] = ()
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.reload()
+
+    def lookup(self, short_code: str) -> Optional[str]:
+        if time.monotonic() - self._checked_at >= self.refresh_seconds:
+            self.reload()
+        key = encode_key(short_code)
+        if key is None:
+            return None
+        # Newest delta first, base last
+        for snapshot_file in self._files:
+            url = snapshot_file.find(key)
+            if url is TOMBSTONE:
+                return None
+            if url is not None:
+                return url
+        return None
+
+    def stats(self) -> Optional[dict]:
+        files = self._files
+        if not files:
+            return None
+        base = files[-1]
+        return {"base_id": base.base_id, "deltas": len(files) - 1, "base_entries": base.count}
+
+    def reload(self):
+        if not self._lock.acquire(blocking=False):
+            return  # another thread is already refreshing
+        try:
+            self._checked_at = time.monotonic()
+            base_path = os.path.join(self.directory, BASE_NAME)
+            if not os.path.exists(base_path):
+                self._files = ()
+                return
+            current = {f.path: f for f in self._files}
+            base = self._open(base_path, current)
+            deltas = []
+            for name in os.listdir(self.directory):
+                match = DELTA_PATTERN.match(name)
+                if match and int(match.group(1)) == base.base_id:
+                    deltas.append((int(match.group(2)), os.path.join(self.directory, name)))
+            files = tuple(self._open(path, current) for _, path in sorted(deltas, reverse=True)) + (base,)
+            if files != self._files:
+                logger.info("Redirect snapshot loaded: base %d with %d delta(s)", base.base_id, len(deltas))
+            # Readers keep a reference to the old tuple; replaced maps are unmapped once unreferenced
+            self._files = files
+        except (OSError, ValueError):
+            logger.exception("Failed to load redirect snapshot from %s", self.directory)
+        finally:
+            self._lock.release()
+
+    @staticmethod
+    def _open(path: str, current: dict) -> SnapshotFile:
+        existing = current.get(path)
+        stat = os.stat(path)
+        if existing is not None and existing.identity == (stat.st_ino, stat.st_mtime_ns):
+            return existing
+        return SnapshotFile(path)
+
+
+_resolver = None
+
+
+def get_resolver() -> Optional[SnapshotResolver]:
+    global _resolver
+    if _resolver is None and settings.SNAPSHOT_DIR:
+        _resolver = SnapshotResolver(settings.SNAPSHOT_DIR)
+    return _resolver
+
+
+def lookup(short_code: str) -> Optional[str]:
+    resolver = get_resolver()
+    return resolver.lookup(short_code) if resolver else None
+
+
+def stats() -> Optional[dict]:
+    resolver = get_resolver()
+    return resolver.stats() if resolver else None
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from app.core.admission import AdmissionClass, AdmissionController
+
+
+def make_controller(redirect_limit=1, queue_timeout_ms=50):
+    return AdmissionController(
+        [
+            AdmissionClass("redirect", 0, redirect_limit, 1, 2, 100),
+            AdmissionClass("shorten", 1, 2, 1, 2, 250),
+            AdmissionClass("admin", 2, 4, 1, 1, 1000),
+        ],
+        queue_timeout_ms,
+    )
+
+
+def test_classify():
+    controller = make_controller()
+    assert controller.classify("GET", "/abc1234").name == "redirect"
+    assert controller.classify("POST", "/v1/shorten").name == "shorten"
+    assert controller.classify("POST", "/v1/resolve").name == "redirect"
+    assert controller.classify("GET", "/api/v1/admin/list").name == "admin"
+    assert controller.classify("GET", "/admin/v1/list").name == "admin"
+    assert controller.classify("GET", "/health") is None
+
+
+def test_queue_handoff_and_timeout():
+    """Over the limit requests wait for a slot and are shed after the queue timeout."""
+    async def scenario():
+        controller = make_controller()
+        redirect = controller.classes["redirect"]
+        assert await controller.acquire(redirect)
+
+        waiter = asyncio.create_task(controller.acquire(redirect))
+        await asyncio.sleep(0)
+        controller.release(redirect, latency_ms=1)
+        assert await waiter is True
+        assert redirect.in_flight == 1
+
+        assert await controller.acquire(redirect) is False
+        assert redirect.stats()["shed"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_lower_priority_shed_while_redirects_wait():
+    async def scenario():
+        controller = make_controller(queue_timeout_ms=1000)
+        redirect, admin = controller.classes["redirect"], controller.classes["admin"]
+        assert await controller.acquire(redirect)
+        waiter = asyncio.create_task(controller.acquire(redirect))
+        await asyncio.sleep(0)
+
+        assert await controller.acquire(admin) is False
+
+        controller.release(redirect, latency_ms=1)
+        assert await waiter is True
+        assert await controller.acquire(admin) is True
+
+    asyncio.run(scenario())
+
+
+def test_aimd_limit_adapts_to_latency():
+    """Slow redirects shrink redirect and lower-priority limits; fast ones grow them back."""
+    async def scenario():
+        controller = make_controller(redirect_limit=10)
+        redirect, admin = controller.classes["redirect"], controller.classes["admin"]
+        assert await controller.acquire(redirect)
+        controller.release(redirect, latency_ms=500)
+        assert redirect.limit == pytest.approx(9)
+        assert admin.limit == pytest.approx(3.6)
+
+        for _ in range(20):
+            assert await controller.acquire(redirect)
+            controller.release(redirect, latency_ms=1)
+        assert redirect.limit == 10
+
+    asyncio.run(scenario())
+
+
+def test_overloaded_response(client, monkeypatch):
+    """Shed requests get 503 with Retry-After."""
+    from app.core.admission import admission_controller
+    from app.core.config import settings
+
+    async def shed(cls):
+        return False
+
+    monkeypatch.setattr(settings, "ADMISSION_CONTROL_ENABLED", True)
+    monkeypatch.setattr(admission_controller, "acquire", shed)
+    response = client.get("/admin/v1/list")
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
@@ -0,0 +1,56 @@
+import pytest
+
+from app.utils.cache_encoding import bucket_for, encode_entry, decode_entry
+
+
+def test_entry_roundtrip():
+    """Entries decode back to the URL until they expire."""
+    entry = encode_entry("https://example.com/a", ttl=60, now=1000)
+    assert decode_entry(entry, now=1059) == "https://example.com/a"
+    assert decode_entry(entry, now=1060) is None
+
+
+def test_long_urls_are_compressed():
+    """URLs over the threshold are stored compressed when that is smaller."""
+    url = "https://example.com/" + "path/segment/" * 30
+    entry = encode_entry(url, ttl=60, compress_min_length=100, now=0)
+    assert len(entry) < len(url)
+    assert decode_entry(entry, now=1) == url
+
+    short = encode_entry("https://example.com/x", ttl=60, compress_min_length=100, now=0)
+    assert short.endswith("|rhttps://example.com/x")
+
+
+def test_malformed_entry():
+    assert decode_entry("garbage", now=0) is None
+    assert decode_entry("zz!|rhttps://example.com", now=0) is None
+    assert decode_entry("zzzzzzz|zNOT-BASE64!!", now=0) is None
+    assert decode_entry("zzzzzzz|zbm90IHpsaWI=", now=0) is None  # base64, not zlib
+
+
+def test_bucket_is_stable_and_in_range():
+    assert bucket_for("abc1234", 1024) == bucket_for("abc1234", 1024)
+    assert all(0 <= bucket_for(f"code{i}", 16) < 16 for i in range(100))
+
+
+def test_compact_put_sweeps_sampled_buckets_and_extends_ttl(fake_redis, monkeypatch):
+    """Only sampled writes read the bucket back; the bucket TTL covers the newest entry."""
+    from types import SimpleNamespace
+    from app.core.config import settings
+    from app.services import RedisURLCache
+
+    monkeypatch.setattr(RedisURLCache, "COMPACT", True)
+    monkeypatch.setattr(RedisURLCache, "_bucket_key", lambda code: "urlb:{0}")
+    fake_redis.hashes["urlb:{0}"] = {"old": encode_entry("https://example.com/old", ttl=60, now=0)}
+
+    monkeypatch.setattr(settings, "CACHE_COMPACT_SWEEP_RATE", 0)
+    RedisURLCache.put("new1", SimpleNamespace(short_code="new1", original_url="https://example.com/1"))
+    assert "hgetall" not in fake_redis.commands
+    assert set(fake_redis.hashes["urlb:{0}"]) == {"old", "new1"}
+    assert fake_redis.ttls["urlb:{0}"] == RedisURLCache.CACHE_TTL
+
+    fake_redis.ttls["urlb:{0}"] = 5  # older TTL than the entry about to be written
+    monkeypatch.setattr(settings, "CACHE_COMPACT_SWEEP_RATE", 1)
+    RedisURLCache.put_many([SimpleNamespace(short_code="new2", original_url="https://example.com/2")])
+    assert fake_redis.ttls["urlb:{0}"] == RedisURLCache.CACHE_TTL
+    assert set(fake_redis.hashes["urlb:{0}"]) == {"new1", "new2"}
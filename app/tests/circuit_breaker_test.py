@@ -0,0 +1,171 @@
+import pytest
+import redis.exceptions
+
+from app.core.circuit_breaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from app.db.Connection.database import GuardedRedis, RedisCircuitOpen
+from app.services.health import health_monitor
+from app.tests.conftest import FakeRedis
+
+
+def test_opens_after_threshold_and_fails_fast():
+    """Consecutive failures open the circuit; further calls never reach Redis."""
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=60)
+    raw = FakeRedis(down=True)
+    client = GuardedRedis(raw, breaker)
+
+    for _ in range(3):
+        with pytest.raises(redis.exceptions.ConnectionError):
+            client.get("url:abc")
+    assert breaker.state == OPEN
+
+    with pytest.raises(RedisCircuitOpen):
+        client.get("url:abc")
+    assert raw.commands == ["get"] * 3
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_half_open_allows_single_probe(monkeypatch):
+    """After the backoff one probe goes through; success closes the circuit."""
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    monkeypatch.setattr(breaker, "_retry_at", 0.0)
+    assert breaker.allow() is True
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() is False
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_health_probe_drives_breaker():
+    """Monitor results trip the breaker and let it recover early."""
+    breaker = CircuitBreaker("test", failure_threshold=5, reset_timeout=60)
+    breaker.record_probe(False)
+    assert breaker.state == OPEN
+    assert breaker.allow() is False
+
+    breaker.record_probe(True)
+    assert breaker.allow() is True
+    assert breaker.state == HALF_OPEN
+
+
+def test_health_reads_cached_status(client, monkeypatch):
+    """/health reports the monitor's cached status and breaker metrics."""
+    monkeypatch.setattr(health_monitor, "_status", {"database": True, "redis": False, "checked_at": 1.0})
+    response = client.get("/health")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["redis"] == "degraded"
+    assert data["checked_at"] == 1.0
+    assert "state" in data["circuit_breakers"]["redis"]
+
+
+def test_probe_ending_in_http_exception_closes_circuit(client, db_session, monkeypatch):
+    """A half-open probe request that ends in a 404 must not wedge the DB breaker."""
+    from app.core import circuit_breaker
+    from app.core.config import settings
+    from app.db.Connection import database
+    from app.main import app
+
+    breaker = CircuitBreaker("database", failure_threshold=1, reset_timeout=60)
+    monkeypatch.setattr(settings, "DB_CIRCUIT_BREAKER", True)
+    monkeypatch.setattr(database, "db_breaker", breaker)
+    # Run the real get_db (with its breaker bookkeeping) on the test database
+    monkeypatch.setattr(database, "new_session", lambda: database.BreakerSession(bind=db_session.get_bind()))
+    app.dependency_overrides.pop(database.get_db)
+
+    breaker.record_failure()
+    monkeypatch.setattr(breaker, "_retry_at", 0.0)
+    assert client.get("/missing1", follow_redirects=False).status_code == 404
+    assert breaker.state == circuit_breaker.CLOSED
+    assert breaker.allow() is True
+
+
+def test_redis_response_error_completes_probe(monkeypatch):
+    """READONLY and friends mean Redis answered: the probe closes the circuit."""
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    monkeypatch.setattr(breaker, "_retry_at", 0.0)
+    with pytest.raises(redis.exceptions.ReadOnlyError):
+        GuardedRedis(FakeRedis(errors={"set": redis.exceptions.ReadOnlyError("READONLY")}), breaker).set("k", "v")
+    assert breaker.state == CLOSED
+
+
+def test_health_probe_unwedges_half_open():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_probe(True)
+    assert breaker.allow() is True  # probe handed out, never reported back
+    assert breaker.allow() is False
+    breaker.record_probe(True)
+    assert breaker.allow() is True
+
+
+def test_open_db_circuit_still_serves_cache_hits(client, db_session, monkeypatch):
+    """The DB breaker is checked on first DB use, not when the session is injected."""
+    from app.core.config import settings
+    from app.db.Connection import database
+    from app.main import app
+    from app.services import RedisURLCache
+
+    breaker = CircuitBreaker("database", failure_threshold=1, reset_timeout=60)
+    monkeypatch.setattr(settings, "DB_CIRCUIT_BREAKER", True)
+    monkeypatch.setattr(database, "db_breaker", breaker)
+    monkeypatch.setattr(database, "new_session", lambda: database.BreakerSession(bind=db_session.get_bind()))
+    app.dependency_overrides.pop(database.get_db)
+    breaker.record_failure()
+
+    monkeypatch.setattr(RedisURLCache, "get", lambda code, request: "https://example.com/cached" if code == "hit" else None)
+    response = client.get("/hit", follow_redirects=False)
+    assert response.status_code == 302
+    assert response.headers["location"] == "https://example.com/cached"
+
+    response = client.get("/miss", follow_redirects=False)
+    assert response.status_code == 503
+    assert breaker.state == OPEN
+
+
+def test_redis_timeout_counts_as_failure(monkeypatch):
+    """A hung Redis (read timeout) trips the breaker like a refused connection."""
+    from app.core.config import settings
+    from app.db.Connection import database
+
+    hung = FakeRedis(errors={"get": redis.exceptions.TimeoutError("Timeout reading from socket")})
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=60)
+    with pytest.raises(redis.exceptions.ConnectionError):
+        GuardedRedis(hung, breaker).get("url:abc")
+    assert breaker.state == OPEN
+
+    monkeypatch.setattr(settings, "REDIS_SOCKET_TIMEOUT", 0.25)
+    assert database._redis_connection_kwargs()["socket_timeout"] == 0.25
+
+
+def test_cluster_breakers_are_per_node(monkeypatch):
+    """Cluster commands and pipelines only consult the breakers of the nodes they touch."""
+    from types import SimpleNamespace
+    from app.core import circuit_breaker
+    from app.core.config import settings
+    from app.db.Connection.database import GuardedClusterRedis
+
+    class FakeCluster(FakeRedis):
+        def get_node_from_key(self, key):
+            return SimpleNamespace(name=key.split(":")[0])
+
+        def get(self, key):
+            if key.startswith("bad"):
+                raise redis.exceptions.ConnectionError("down")
+            return super().get(key)
+
+    monkeypatch.setattr(circuit_breaker, "redis_node_breakers", {})
+    client = GuardedClusterRedis(FakeCluster({"good:1": "v", "good:2": "v"}))
+    for _ in range(settings.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(redis.exceptions.ConnectionError):
+            client.get("bad:1")
+
+    assert circuit_breaker.redis_node_breakers["bad"].state == OPEN
+    assert client.get("good:1") == "v"
+    assert client.pipeline().get("good:1").get("good:2").execute() == ["v", "v"]
+    with pytest.raises(RedisCircuitOpen):
+        client.pipeline().get("good:1").get("bad:1").execute()
@@ -0,0 +1,132 @@
+from datetime import datetime
+
+import pytest
+
+from app.core.config import settings
+from app.db.Connection import database
+from app.db.redis_keys import CLICK_STREAM_KEY, CLICK_STREAM_GROUP
+from app.workers import click_consumer
+from app.workers.click_consumer import ClickConsumer, to_row
+from app.tests.conftest import FakeRedis
+
+
+def test_redirect_publishes_click_event(client, fake_redis, monkeypatch):
+    """With the stream enabled a redirect appends an event instead of touching the DB."""
+    monkeypatch.setattr(settings, "CLICK_STREAM_ENABLED", True)
+    code = client.post("/v1/shorten", json={"url": "https://example.com/stream"}).json()["short_code"]
+
+    client.get(
+        f"/{code.upper()}",
+        headers={"referer": "https://chat.example.com", "user-agent": "bot/1.0", "x-forwarded-for": "10.0.0.1"},
+        follow_redirects=False,
+    )
+
+    assert fake_redis.streams[CLICK_STREAM_KEY] == [
+        ("1-0", {"c": code, "ip": "10.0.0.1", "r": "https://chat.example.com", "ua": "bot/1.0"})
+    ]
+    assert fake_redis.maxlen[CLICK_STREAM_KEY] == settings.CLICK_STREAM_MAXLEN
+    assert client.get(f"/admin/v1/stats/{code}").json()["click_count"] == 0
+
+
+def test_publish_click_drops_event_when_redis_is_down(client, monkeypatch):
+    """No synchronous DB write per redirect while Redis is unavailable; the drop is counted."""
+    from app.services import metrics
+    monkeypatch.setattr(database, "get_redis", lambda: FakeRedis(down=True))
+    monkeypatch.setattr(metrics, "record_click", lambda code: pytest.fail("DB write on redirect"))
+    monkeypatch.setattr(settings, "CLICK_STREAM_ENABLED", True)
+    before = metrics.dropped_clicks()
+
+    metrics.publish_click({"c": "abc1234"})
+    assert metrics.dropped_clicks() == before + 1
+    assert client.get("/health").json()["click_stream"]["dropped"] == before + 1
+
+
+def test_to_row_uses_stream_id_timestamp():
+    row = to_row("1700000000123-0", {"c": "abc1234", "ua": "bot"})
+    assert row[0] == "1700000000123-0"
+    assert row[1] == datetime.utcfromtimestamp(1700000000.123)
+    assert row[2:] == ("abc1234", None, "bot", None)
+
+
+def test_consumer_acks_after_write(monkeypatch):
+    """Entries are acked only after the batch is written; trimmed entries are just acked."""
+    fake = FakeRedis()
+    written = []
+    monkeypatch.setattr(click_consumer, "write_batch", lambda engine, rows: written.append(rows))
+    consumer = ClickConsumer(fake, engine=None, consumer_name="test")
+    monkeypatch.setattr(consumer, "_ensure_partitions", lambda: None)
+
+    handled = consumer.process([("1-0", {"c": "abc"}), ("2-0", {})])
+    assert handled == 2
+    assert [row[0] for row in written[0]] == ["1-0"]
+    assert fake.acked == [(CLICK_STREAM_KEY, CLICK_STREAM_GROUP, ("1-0", "2-0"))]
+
+
+def test_consumer_isolates_bad_rows(monkeypatch):
+    """A row the DB rejects is dropped on its own; the rest of the batch is written and acked."""
+    import psycopg2
+    fake = FakeRedis()
+    written = []
+
+    def write(engine, rows):
+        if any(row[2] == "bad" for row in rows):
+            raise psycopg2.DataError("value too long")
+        written.extend(rows)
+
+    monkeypatch.setattr(click_consumer, "write_batch", write)
+    consumer = ClickConsumer(fake, engine=None, consumer_name="test")
+    monkeypatch.setattr(consumer, "_ensure_partitions", lambda: None)
+
+    assert consumer.process([("1-0", {"c": "abc"}), ("2-0", {"c": "bad"}), ("3-0", {"c": "def"})]) == 3
+    assert [row[0] for row in written] == ["1-0", "3-0"]
+    assert fake.acked == [(CLICK_STREAM_KEY, CLICK_STREAM_GROUP, ("1-0", "2-0", "3-0"))]
+
+
+def test_click_event_drops_invalid_client_ip():
+    from starlette.requests import Request
+    from app.services.metrics import click_event
+
+    def request(xff):
+        return Request({"type": "http", "headers": [(b"x-forwarded-for", xff.encode())], "client": None})
+
+    assert click_event(request("x" * 100), "abc")["c"] == "abc"
+    assert "ip" not in click_event(request("x" * 100), "abc")
+    assert click_event(request("2001:db8::1, 10.0.0.1"), "abc")["ip"] == "2001:db8::1"
+    assert to_row("1-0", {"c": "abc", "ip": "y" * 100})[5] == "y" * 45
+
+
+def test_consumer_does_not_ack_failed_batch(monkeypatch):
+    fake = FakeRedis()
+
+    def fail(engine, rows):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(click_consumer, "write_batch", fail)
+    consumer = ClickConsumer(fake, engine=None, consumer_name="test")
+    monkeypatch.setattr(consumer, "_ensure_partitions", lambda: None)
+
+    with pytest.raises(RuntimeError):
+        consumer.process([("1-0", {"c": "abc"})])
+    assert fake.acked == []
+
+
+def test_consumer_survives_errors_during_startup_recovery(monkeypatch):
+    """A failure while draining pending entries at startup is retried, not fatal."""
+    fake = FakeRedis()
+    consumer = ClickConsumer(fake, engine=None, consumer_name="test")
+    calls = []
+
+    def recover():
+        calls.append("recover")
+        if len(calls) == 1:
+            raise RuntimeError("db down")
+
+    def read(stream_id):
+        consumer.stop()
+        return []
+
+    monkeypatch.setattr(consumer, "_recover", recover)
+    monkeypatch.setattr(consumer, "_read", read)
+    monkeypatch.setattr(click_consumer.time, "sleep", lambda seconds: None)
+    consumer.run()
+    assert calls == ["recover", "recover"]
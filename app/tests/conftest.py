@@ -1,4 +1,5 @@
 import pytest
+import redis.exceptions
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -54,4 +55,153 @@ def sample_urls():
         "https://example.com/test1",
         "https://google.com/search?q=test",
         "https://github.com/user/repo",
-    ]
\ No newline at end of file
+    ]
+
+class FakeRedis:
+    """In-memory stand-in for a single Redis node (strings, hashes, streams).
+
+    ``errors`` maps a command name to the exception it raises; with ``down`` set
+    every command fails like an unreachable server. Commands that are not
+    implemented here fail the same way, so code under test falls back as it
+    would with Redis down. ``commands`` records every command that was issued.
+    """
+
+    def __init__(self, data=None, down=False, errors=None):
+        self.data = dict(data or {})
+        self.hashes, self.ttls, self.streams = {}, {}, {}
+        self.groups, self.maxlen, self.acked = set(), {}, []
+        self.errors = dict(errors or {})
+        self.down = down
+        self.commands = []
+        self.pipelines = 0
+
+    def __getattr__(self, name):
+        def unavailable(*args, **kwargs):
+            raise redis.exceptions.ConnectionError("down")
+        return unavailable
+
+    def _call(self, name):
+        self.commands.append(name)
+        if self.down:
+            raise redis.exceptions.ConnectionError("down")
+        if name in self.errors:
+            raise self.errors[name]
+
+    def ping(self):
+        self._call("ping")
+        return True
+
+    def get(self, key):
+        self._call("get")
+        return self.data.get(key)
+
+    def mget(self, keys):
+        self._call("mget")
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, nx=False, ex=None):
+        self._call("set")
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        if ex is not None:
+            self.ttls[key] = ex
+        return True
+
+    def setex(self, key, time, value):
+        self._call("setex")
+        self.data[key] = value
+        self.ttls[key] = time
+        return True
+
+    def incr(self, key, amount=1):
+        self._call("incr")
+        self.data[key] = int(self.data.get(key, 0)) + amount
+        return self.data[key]
+
+    def expire(self, name, time, nx=False, gt=False):
+        self._call("expire")
+        current = self.ttls.get(name)
+        if (nx and current is not None) or (gt and (current is None or time <= current)):
+            return False
+        self.ttls[name] = time
+        return True
+
+    def hset(self, name, key=None, value=None, mapping=None):
+        self._call("hset")
+        fields = dict(mapping or {})
+        if key is not None:
+            fields[key] = value
+        self.hashes.setdefault(name, {}).update(fields)
+        return len(fields)
+
+    def hget(self, name, key):
+        self._call("hget")
+        return self.hashes.get(name, {}).get(key)
+
+    def hgetall(self, name):
+        self._call("hgetall")
+        return dict(self.hashes.get(name, {}))
+
+    def hdel(self, name, *fields):
+        self._call("hdel")
+        bucket = self.hashes.get(name, {})
+        return sum(bucket.pop(field, None) is not None for field in fields)
+
+    def xadd(self, name, fields, maxlen=None, approximate=True):
+        self._call("xadd")
+        entries = self.streams.setdefault(name, [])
+        entry_id = f"{len(entries) + 1}-0"
+        entries.append((entry_id, fields))
+        self.maxlen[name] = maxlen
+        return entry_id
+
+    def xgroup_create(self, name, groupname, id="0", mkstream=False):
+        self._call("xgroup_create")
+        self.streams.setdefault(name, [])
+        self.groups.add((name, groupname))
+        return True
+
+    def xreadgroup(self, groupname, consumername, streams, count=None, block=None):
+        self._call("xreadgroup")
+        (name, _), = streams.items()
+        if (name, groupname) not in self.groups:
+            raise redis.exceptions.ResponseError("NOGROUP No such key or consumer group")
+        return [[name, self.streams[name]]]
+
+    def xack(self, name, groupname, *ids):
+        self._call("xack")
+        self.acked.append((name, groupname, ids))
+        return len(ids)
+
+    def pipeline(self, transaction=False):
+        self.pipelines += 1
+        return FakePipeline(self)
+
+    def close(self):
+        pass
+
+
+class FakePipeline:
+    """Queues commands and runs them against the FakeRedis on execute()."""
+
+    def __init__(self, redis_client):
+        self._redis, self._calls = redis_client, []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self._calls.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        calls, self._calls = self._calls, []
+        return [getattr(self._redis, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """An empty FakeRedis that get_redis() hands out for the duration of the test."""
+    fake = FakeRedis()
+    monkeypatch.setattr(database, "get_redis", lambda: fake)
+    return fake
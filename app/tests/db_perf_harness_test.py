@@ -0,0 +1,50 @@
+import math
+import random
+
+from app.tools.db_perf_harness import (
+    CODE_SCATTER, RANK_SCATTER, RowStream, event_lines, seq_scans, short_code_for, url_lines, zipf_rank,
+)
+from app.utils.encoding import BASE, SHORT_CODE_LENGTH, decode_short_code, encode_short_code
+
+
+def test_generated_codes_are_distinct():
+    codes = [short_code_for(i) for i in range(100000)]
+    assert len(set(codes)) == len(codes)
+    assert all(len(code) == 7 and decode_short_code(encode_short_code(code)) == code for code in codes[:100])
+
+
+def test_scatter_multipliers_are_permutations():
+    assert math.gcd(CODE_SCATTER, BASE ** SHORT_CODE_LENGTH) == 1
+    assert all(math.gcd(RANK_SCATTER, rows) == 1 for rows in (1000, 10000000, 20000000))
+
+
+def test_generated_rows_copy_format():
+    url_row = next(url_lines(1000, 1.1)).rstrip("\n").split("\t")
+    assert url_row[:3] == ["1", short_code_for(0), str(encode_short_code(short_code_for(0)))]
+    assert len(url_row) == 8
+
+    # Events follow the same ranking as the click counts: row 0 has rank 1
+    codes = [line.split("\t")[2] for line in event_lines(5000, 1000)]
+    assert max(set(codes), key=codes.count) == short_code_for(0)
+
+    stream = RowStream(iter(["a\n", "b\n", "c\n"]), chunk_lines=2)
+    assert [stream.read(), stream.read(), stream.read()] == [b"a\nb\n", b"c\n", b""]
+
+
+def test_zipf_rank_is_skewed():
+    rng = random.Random(1)
+    ranks = [zipf_rank(rng, 10000) for _ in range(10000)]
+    assert all(1 <= rank <= 10000 for rank in ranks)
+    assert sum(rank <= 100 for rank in ranks) > len(ranks) / 3
+
+
+def test_seq_scans_found_in_nested_plan():
+    plan = {
+        "Node Type": "Aggregate",
+        "Plans": [
+            {"Node Type": "Gather", "Plans": [{"Node Type": "Seq Scan", "Relation Name": "urls", "Parallel Aware": True}]},
+            {"Node Type": "Index Scan", "Relation Name": "click_events"},
+        ],
+    }
+    assert seq_scans(plan) == ["urls"]
+    assert seq_scans({"Node Type": "Index Only Scan", "Relation Name": "urls"}) == []
@@ -0,0 +1,20 @@
+import pytest
+
+from app.utils.encoding import ALPHABET, encode_short_code, decode_short_code, generate_short_code
+
+
+def test_short_code_integer_roundtrip():
+    """Every base36 code up to 10 chars maps to a distinct BIGINT and back."""
+    for code in ["0", "00", "000abc", "zzzzzzzzzz", generate_short_code()]:
+        value = encode_short_code(code)
+        assert 0 < value < 2 ** 63
+        assert decode_short_code(value) == code
+    assert encode_short_code("0") != encode_short_code("00")
+
+
+def test_unencodable_aliases():
+    """Aliases outside the alphabet (or too long) stay string-only."""
+    assert encode_short_code("my_brand") is None
+    assert encode_short_code("MyBrand") is None
+    assert encode_short_code("") is None
+    assert encode_short_code("a" * 11) is None
@@ -0,0 +1,65 @@
+import json
+import logging
+import queue
+
+import pytest
+
+from app.core.logging_config import EventRateLimitFilter, JSONFormatter, NonBlockingQueueHandler
+
+
+def make_record(msg="Redirect cache HIT for %s", args=("abc",), level=logging.INFO, **extra):
+    record = logging.LogRecord("app.test", level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_rate_limit_per_event():
+    """Each message template is capped per second; errors always pass."""
+    f = EventRateLimitFilter(per_second=2)
+    assert [f.filter(make_record()) for _ in range(4)] == [True, True, False, False]
+    assert f.filter(make_record(msg="other event %s")) is True
+    assert f.filter(make_record(level=logging.ERROR)) is True
+
+
+def test_sample_rate_extra():
+    """extra={'sample_rate': 0} drops the record."""
+    f = EventRateLimitFilter(per_second=0)
+    assert f.filter(make_record(sample_rate=0.0)) is False
+    assert f.filter(make_record(sample_rate=1.0)) is True
+
+
+def test_json_formatter():
+    payload = json.loads(JSONFormatter().format(make_record(suppressed=3)))
+    assert payload["msg"] == "Redirect cache HIT for abc"
+    assert payload["level"] == "INFO"
+    assert payload["suppressed"] == 3
+
+
+def test_queue_handler_drops_instead_of_blocking():
+    """A full queue never blocks the request thread."""
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    before = NonBlockingQueueHandler.dropped
+    handler.emit(make_record())
+    handler.emit(make_record())
+    assert handler.queue.qsize() == 1
+    assert NonBlockingQueueHandler.dropped == before + 1
+    # Records are passed through unformatted
+    assert handler.queue.get_nowait().args == ("abc",)
+
+
+def test_queue_handler_writes_directly_until_listener_starts():
+    """No listener thread is needed (or started) for records to be written."""
+    written = []
+
+    class Collect(logging.Handler):
+        def emit(self, record):
+            written.append(record.getMessage())
+
+    handler = NonBlockingQueueHandler(None, fallback=Collect())
+    handler.handle(make_record())
+    assert written == ["Redirect cache HIT for abc"]
+
+
+def test_health_reports_dropped_log_records(client, monkeypatch):
+    monkeypatch.setattr(NonBlockingQueueHandler, "dropped", 7)
+    assert client.get("/health").json()["logging"]["dropped"] == 7
@@ -0,0 +1,27 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.db.Connection import database
+
+
+def test_create_app_does_not_touch_connections(monkeypatch):
+    """Building the app must not open DB/Redis pools (safe to preload before fork)."""
+    def fail():
+        raise AssertionError("connection created at app construction")
+
+    monkeypatch.setattr(database, "get_engine", fail)
+    monkeypatch.setattr(database, "get_redis", fail)
+    app = create_app()
+    assert any(route.path == "/health" for route in app.routes)
+
+
+def test_lifespan_opens_and_closes_connections(monkeypatch):
+    """Pools are opened on worker startup and released on shutdown."""
+    calls = []
+    monkeypatch.setattr(database, "init_connections", lambda: calls.append("init"))
+    monkeypatch.setattr(database, "close_connections", lambda: calls.append("close"))
+
+    with TestClient(create_app()):
+        assert calls == ["init"]
+    assert calls == ["init", "close"]
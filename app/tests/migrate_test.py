@@ -0,0 +1,63 @@
+from app.db.Models import models
+from app.db.migrate import migrate_config_keys
+from app.tests.conftest import FakeRedis
+
+
+def test_migrate_config_keys(db_session):
+    """Old config:* values move under the {config} hash tag without clobbering new ones."""
+    db_session.add(models.SystemConfig(key="FEATURE_X", value="on"))
+    db_session.commit()
+    fake = FakeRedis({
+        "config:RATE_LIMIT_LIMIT": "500",
+        "config:RATE_LIMIT_WINDOW": "30",
+        "{config}:RATE_LIMIT_WINDOW": "10",
+    })
+
+    assert migrate_config_keys(db_session.get_bind(), fake) == 2
+    assert fake.data["{config}:RATE_LIMIT_LIMIT"] == "500"
+    assert fake.data["{config}:RATE_LIMIT_WINDOW"] == "10"
+    assert fake.data["{config}:FEATURE_X"] == "on"
+    assert migrate_config_keys(db_session.get_bind(), fake) == 0
+
+
+class FakePostgres:
+    """Records statements; reports ix_urls_code_id as INVALID."""
+
+    dialect = type("Dialect", (), {"name": "postgresql"})
+
+    def __init__(self):
+        self.statements = []
+
+    def begin(self):
+        return self
+
+    def connect(self):
+        return self
+
+    def execution_options(self, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        return self
+
+    def scalar(self):
+        return False
+
+    def all(self):
+        return []
+
+
+def test_migrate_rebuilds_invalid_code_id_index():
+    from app.db.migrate import migrate_code_ids
+    engine = FakePostgres()
+    migrate_code_ids(engine)
+    drop = next(i for i, sql in enumerate(engine.statements) if sql.startswith("DROP INDEX CONCURRENTLY"))
+    create = next(i for i, sql in enumerate(engine.statements) if sql.startswith("CREATE UNIQUE INDEX CONCURRENTLY"))
+    assert drop < create
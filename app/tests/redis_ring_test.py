@@ -0,0 +1,103 @@
+import pytest
+import redis.exceptions
+
+from app.db.Connection.redis_ring import HashRing, ShardedRedis, hash_tag
+from app.db.redis_keys import config_key
+from app.tests.conftest import FakeRedis
+
+
+def test_hash_tag():
+    """Only the {tag} part is used for placement, like Redis Cluster."""
+    assert hash_tag("url:abc") == "url:abc"
+    assert hash_tag("{config}:RATE_LIMIT_LIMIT") == "config"
+    assert hash_tag("foo{}bar") == "foo{}bar"
+
+
+def test_ring_colocates_hash_tags():
+    """Keys sharing a hash tag land on the same node."""
+    ring = HashRing([f"node{i}:6379" for i in range(5)])
+    assert ring.get_node(config_key("RATE_LIMIT_LIMIT")) == ring.get_node(config_key("RATE_LIMIT_WINDOW"))
+
+
+def test_ring_minimal_remap_on_membership_change():
+    """Adding a node only moves keys onto the new node (~1/N of them)."""
+    ring = HashRing([f"node{i}:6379" for i in range(4)])
+    keys = [f"url:{i}" for i in range(5000)]
+    before = {k: ring.get_node(k) for k in keys}
+
+    ring.add_node("node4:6379")
+    moved = [k for k in keys if ring.get_node(k) != before[k]]
+    assert all(ring.get_node(k) == "node4:6379" for k in moved)
+    assert 0.1 < len(moved) / len(keys) < 0.3
+
+    ring.remove_node("node4:6379")
+    assert all(ring.get_node(k) == before[k] for k in keys)
+
+
+def test_sharded_mget_and_pipeline_grouped_per_node():
+    """Batch ops issue one call per node and keep caller ordering."""
+    nodes = {}
+    sharded = ShardedRedis(["a:1", "b:1", "c:1"], client_factory=lambda n: nodes.setdefault(n, FakeRedis()))
+    keys = [f"url:{i}" for i in range(30)]
+
+    pipe = sharded.pipeline()
+    for i, key in enumerate(keys):
+        pipe.set(key, str(i))
+    assert pipe.execute() == [True] * len(keys)
+    assert sum(node.pipelines for node in nodes.values()) == len(nodes)
+
+    assert sharded.mget(keys + ["url:missing"]) == [str(i) for i in range(30)] + [None]
+    assert sharded.get("url:7") == "7"
+    assert nodes[sharded.node_for("url:7")].data["url:7"] == "7"
+
+
+def test_ring_routes_stream_reads_by_stream_key(monkeypatch):
+    """xreadgroup goes to the node owning the stream, not the one owning the group name."""
+    from app.db.redis_keys import CLICK_STREAM_KEY, CLICK_STREAM_GROUP
+    from app.workers import click_consumer
+
+    for node_count in (2, 3):
+        nodes = {f"r{i}:6379": FakeRedis() for i in range(1, node_count + 1)}
+        ring = ShardedRedis(list(nodes), client_factory=nodes.__getitem__)
+        written = []
+        monkeypatch.setattr(click_consumer, "write_batch", lambda engine, rows: written.extend(rows))
+        consumer = click_consumer.ClickConsumer(ring, engine=None, consumer_name="c1", batch_size=10, block_ms=1)
+        monkeypatch.setattr(consumer, "_ensure_partitions", lambda: None)
+
+        consumer.ensure_group()
+        ring.xadd(CLICK_STREAM_KEY, {"c": "abc1234"})
+        assert consumer.process(consumer._read(">")) == 1
+        assert [row[2] for row in written] == ["abc1234"]
+        assert nodes[ring.node_for(CLICK_STREAM_KEY)].acked == [(CLICK_STREAM_KEY, CLICK_STREAM_GROUP, ("1-0",))]
+        if ring.node_for(CLICK_STREAM_GROUP) != ring.node_for(CLICK_STREAM_KEY):
+            assert not nodes[ring.node_for(CLICK_STREAM_GROUP)].streams
+
+    with pytest.raises(ValueError):
+        ShardedRedis(["a:1", "b:1"], client_factory=lambda n: FakeRedis()).xread({f"s{i}": "0" for i in range(50)})
+
+
+def test_ring_keeps_one_breaker_per_node(monkeypatch):
+    """A failing shard opens only its own breaker; keys on other nodes keep working."""
+    from app.core import circuit_breaker
+    from app.core.config import settings
+    from app.db.Connection import database
+
+    monkeypatch.setattr(circuit_breaker, "redis_node_breakers", {})
+    monkeypatch.setattr(settings, "REDIS_MODE", "ring")
+    monkeypatch.setattr(settings, "REDIS_NODES", "good:6379,bad:6379")
+    monkeypatch.setattr(database.redis, "Redis", lambda host, port, **kw: FakeRedis(down=True) if host == "bad" else FakeRedis())
+    ring = database._build_redis_client()
+
+    bad_key = next(f"url:{i}" for i in range(1000) if ring.node_for(f"url:{i}") == "bad:6379")
+    good_key = next(f"url:{i}" for i in range(1000) if ring.node_for(f"url:{i}") == "good:6379")
+    for _ in range(settings.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(redis.exceptions.ConnectionError):
+            ring.get(bad_key)
+
+    stats = circuit_breaker.redis_breaker_stats()
+    assert stats["bad:6379"]["state"] == circuit_breaker.OPEN
+    assert stats["good:6379"]["state"] == circuit_breaker.CLOSED
+    ring.set(good_key, "v")
+    assert ring.get(good_key) == "v"
+    with pytest.raises(database.RedisCircuitOpen):
+        ring.get(bad_key)
@@ -108,3 +108,177 @@ def test_redirect_not_found(client):
     """Test redirect with non-existent short code."""
     response = client.get("/nonexistent", follow_redirects=False)
     assert response.status_code == 404
+
+
+def test_resolve_batch(client):
+    """Test batch resolve returns targets in request order."""
+    code1 = client.post("/v1/shorten", json={"url": "https://example.com/one"}).json()["short_code"]
+    code2 = client.post("/v1/shorten", json={"url": "https://example.com/two"}).json()["short_code"]
+
+    response = client.post("/v1/resolve", json={"short_codes": [code2, "missing", code1.upper()]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["short_code"] for r in results] == [code2, "missing", code1]
+    assert results[0]["url"] == "https://example.com/two"
+    assert results[0]["short_url"].endswith(code2)
+    assert results[1]["found"] is False
+    assert results[1]["url"] is None
+    assert results[2]["url"] == "https://example.com/one"
+
+
+def test_resolve_with_metadata(client):
+    """include_metadata adds the stored fields; without it they are omitted (null)."""
+    code = client.post("/v1/shorten", json={"url": "https://example.com/meta"}).json()["short_code"]
+
+    plain = client.post("/v1/resolve", json={"short_codes": [code]}).json()["results"][0]
+    assert plain["click_count"] is None
+
+    results = client.post(
+        "/v1/resolve", json={"short_codes": [code, "missing"], "include_metadata": True}
+    ).json()["results"]
+    assert results[0]["url"] == "https://example.com/meta"
+    assert results[0]["click_count"] == 0
+    assert results[0]["is_active"] is True
+    assert results[0]["created_at"] is not None
+    assert results[1] == {**results[1], "found": False, "created_at": None}
+
+
+def test_resolve_does_not_count_clicks(client):
+    """Test that resolving a short code does not record a click."""
+    code = client.post("/v1/shorten", json={"url": "https://example.com/preview"}).json()["short_code"]
+    client.post("/v1/resolve", json={"short_codes": [code]})
+
+    stats = client.get(f"/admin/v1/stats/{code}").json()
+    assert stats["click_count"] == 0
+
+
+def test_resolve_too_many_codes(client):
+    """Test that batches over the configured limit are rejected."""
+    response = client.post("/v1/resolve", json={"short_codes": ["abc"] * 101})
+    assert response.status_code == 422
+
+
+def test_integer_short_code_storage(client, monkeypatch):
+    """Lookups by integer code_id, with string fallback for non-base36 aliases."""
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "SHORT_CODE_STORAGE", "integer")
+
+    code = client.post("/v1/shorten", json={"url": "https://example.com/int"}).json()["short_code"]
+    client.post("/v1/shorten", json={"url": "https://example.com/alias", "custom_alias": "my_alias"})
+
+    assert client.get(f"/{code}", follow_redirects=False).headers["location"] == "https://example.com/int"
+    assert client.get("/MY_ALIAS", follow_redirects=False).headers["location"] == "https://example.com/alias"
+    results = client.post("/v1/resolve", json={"short_codes": [code, "my_alias"]}).json()["results"]
+    assert [r["found"] for r in results] == [True, True]
+
+
+def test_integer_storage_finds_rows_without_code_id(client, db_session, monkeypatch):
+    """Rows written by old instances (code_id NULL) still resolve before the backfill."""
+    from app.core.config import settings
+    from app.db.Models.models import URLItem
+    monkeypatch.setattr(settings, "SHORT_CODE_STORAGE", "integer")
+    db_session.add(URLItem(short_code="old1234", code_id=None, original_url="https://example.com/old"))
+    db_session.commit()
+
+    assert client.get("/old1234", follow_redirects=False).headers["location"] == "https://example.com/old"
+    results = client.post("/v1/resolve", json={"short_codes": ["old1234"]}).json()["results"]
+    assert results[0]["found"] is True
+
+    from app.db import repository
+    assert repository.increment_click(db_session, "old1234") == 1
+
+    # After the backfill the fallback is switched off: a miss is a single query
+    monkeypatch.setattr(settings, "CODE_ID_FALLBACK", False)
+    assert client.get("/old1234", follow_redirects=False).status_code == 404
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """File-backed SQLite with one connection per thread, for concurrent creates."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.db.Models.models import Base
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'urls.db'}", connect_args={"check_same_thread": False, "timeout": 30})
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+def _create_in_parallel(session_factory, requests):
+    """Runs URLService.create_short_url for each (url, alias) at once; returns short codes or errors."""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    from app.services.shortener import URLService
+
+    barrier = threading.Barrier(len(requests))
+
+    def create(request):
+        db = session_factory()
+        try:
+            barrier.wait()
+            return URLService.create_short_url(db, *request).short_code
+        except ValueError as e:
+            return e
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(len(requests)) as pool:
+        return list(pool.map(create, requests))
+
+
+def test_concurrent_create_same_url(session_factory):
+    """Parallel shortens of one URL all get the same code and create one row."""
+    from app.db.Models.models import URLItem
+
+    results = _create_in_parallel(session_factory, [("https://example.com/hot", None)] * 16)
+    assert len(set(results)) == 1 and isinstance(results[0], str)
+    with session_factory() as db:
+        assert db.query(URLItem).count() == 1
+
+
+def test_concurrent_create_same_alias(session_factory):
+    """Exactly one of many requests racing for an alias wins; the rest get a conflict."""
+    from app.db.Models.models import URLItem
+
+    results = _create_in_parallel(session_factory, [(f"https://example.com/{i}", "Race") for i in range(16)])
+    assert results.count("race") == 1
+    assert all("already exists" in str(r) for r in results if r != "race")
+
+    # Repeating the winning request is idempotent, not a conflict
+    with session_factory() as db:
+        winner = db.query(URLItem).filter(URLItem.short_code == "race").one().original_url
+    assert _create_in_parallel(session_factory, [(winner, "race")] * 8) == ["race"] * 8
+
+
+def test_custom_alias_for_existing_url(client):
+    """A URL that already has a code can't get a second one through an alias."""
+    client.post("/v1/shorten", json={"url": "https://example.com/dup"})
+    response = client.post("/v1/shorten", json={"url": "https://example.com/dup", "custom_alias": "other"})
+    assert response.status_code == 409
+    assert "already exists" in response.json()["detail"]
+
+
+def test_generated_code_collision_is_retried(db_session, monkeypatch):
+    """A taken generated code is retried; a repeated URL returns its row without an update."""
+    from sqlalchemy import event
+    from app.db import repository
+    codes = iter(["aaaaaaa", "aaaaaaa", "bbbbbbb"])
+    monkeypatch.setattr(repository, "generate_short_code", lambda: next(codes))
+
+    first = repository.create_url(db_session, None, "https://example.com/one")
+    second = repository.create_url(db_session, None, "https://example.com/two")
+    assert (first.short_code, second.short_code) == ("aaaaaaa", "bbbbbbb")
+
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement.upper())
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", listener)
+    try:
+        monkeypatch.setattr(repository, "generate_short_code", lambda: "ccccccc")
+        assert repository.create_url(db_session, None, "https://example.com/one").short_code == "aaaaaaa"
+    finally:
+        event.remove(db_session.get_bind(), "before_cursor_execute", listener)
+    assert not any("UPDATE" in statement for statement in statements)
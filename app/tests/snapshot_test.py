@@ -0,0 +1,161 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.db.Models.models import URLItem
+from app.services import snapshot
+from app.services.snapshot import SnapshotResolver, write_snapshot
+from app.tools.build_snapshot import build_delta, build_full
+
+
+def test_snapshot_lookup(tmp_path):
+    rows = sorted((f"c{i:05d}", f"https://example.com/{i}") for i in range(1000))
+    assert write_snapshot(str(tmp_path / "base.snap"), rows, 1, 0) == 1000
+    resolver = SnapshotResolver(str(tmp_path), refresh_seconds=60)
+
+    assert resolver.lookup("c00000") == "https://example.com/0"
+    assert resolver.lookup("c00999") == "https://example.com/999"
+    assert resolver.lookup("c0042") is None
+    assert resolver.lookup("zzzzzz") is None
+    assert resolver.lookup("a" * 11) is None
+
+
+def test_snapshot_rejects_unsorted_rows(tmp_path):
+    with pytest.raises(ValueError):
+        write_snapshot(str(tmp_path / "base.snap"), [("b", "https://b"), ("a", "https://a")], 1, 0)
+    assert os.listdir(tmp_path) == []
+
+
+def test_snapshot_deltas_and_swap(tmp_path):
+    directory = str(tmp_path)
+    write_snapshot(os.path.join(directory, "base.snap"), [("aaa", "https://a"), ("bbb", "https://b")], 1, 0)
+    resolver = SnapshotResolver(directory, refresh_seconds=0)
+
+    write_snapshot(os.path.join(directory, "delta-1-000001.snap"), [("bbb", None), ("ccc", "https://c")], 1, 0)
+    write_snapshot(os.path.join(directory, "delta-1-000002.snap"), [("ccc", "https://c2")], 1, 0)
+    # Delta of some other base is ignored
+    write_snapshot(os.path.join(directory, "delta-9-000001.snap"), [("aaa", "https://stale")], 9, 0)
+    assert resolver.lookup("aaa") == "https://a"
+    assert resolver.lookup("bbb") is None
+    assert resolver.lookup("ccc") == "https://c2"
+
+    # A new base replaces the file atomically and drops the old deltas
+    write_snapshot(os.path.join(directory, "base.snap"), [("ddd", "https://d")], 2, 0)
+    assert resolver.lookup("ddd") == "https://d"
+    assert resolver.lookup("ccc") is None
+
+
+def test_build_full_and_delta(db_session, tmp_path):
+    created = datetime.utcnow() - timedelta(days=1)
+    db_session.add_all([
+        URLItem(short_code="abc1234", original_url="https://example.com/a", created_at=created),
+        URLItem(short_code="Brand", original_url="https://example.com/brand", created_at=created),
+        URLItem(short_code="gone", original_url="https://example.com/gone", is_active=False, created_at=created),
+    ])
+    db_session.commit()
+    directory = str(tmp_path)
+    engine = db_session.get_bind()
+
+    assert build_full(engine, directory) == 2
+    assert build_delta(engine, directory) == 0
+
+    db_session.add(URLItem(short_code="new0001", original_url="https://example.com/new"))
+    db_session.commit()
+    # Includes the rows created within DELTA_OVERLAP of the previous cursor
+    assert build_delta(engine, directory) == 4
+
+    resolver = SnapshotResolver(directory)
+    assert resolver.lookup("Brand") == "https://example.com/brand"
+    assert resolver.lookup("new0001") == "https://example.com/new"
+    assert resolver.lookup("gone") is None
+
+
+def test_delta_build_merges_deltas_over_the_cap(db_session, tmp_path, monkeypatch):
+    """Past SNAPSHOT_MAX_DELTAS the deltas are merged into one, newest entry winning."""
+    db_session.add(URLItem(short_code="base001", original_url="https://example.com/base",
+                           created_at=datetime.utcnow() - timedelta(days=1)))
+    db_session.commit()
+    directory = str(tmp_path)
+    build_full(db_session.get_bind(), directory)
+    base_id = snapshot.SnapshotFile(os.path.join(directory, "base.snap")).base_id
+
+    write_snapshot(os.path.join(directory, f"delta-{base_id}-000001.snap"),
+                   [("aaa", "https://a"), ("bbb", "https://b1"), ("ccc", "https://c")], base_id, 0)
+    write_snapshot(os.path.join(directory, f"delta-{base_id}-000002.snap"),
+                   [("bbb", "https://b2"), ("ccc", None)], base_id, 0)
+    db_session.add(URLItem(short_code="new0001", original_url="https://example.com/new"))
+    db_session.commit()
+    monkeypatch.setattr(settings, "SNAPSHOT_MAX_DELTAS", 2)
+
+    assert build_delta(db_session.get_bind(), directory) == 5
+    assert sorted(os.listdir(directory)) == ["base.snap", f"delta-{base_id}-000003.snap"]
+    resolver = SnapshotResolver(directory)
+    assert resolver.lookup("aaa") == "https://a"
+    assert resolver.lookup("bbb") == "https://b2"
+    assert resolver.lookup("ccc") is None  # tombstone kept over the older delta
+    assert resolver.lookup("base001") == "https://example.com/base"
+    assert resolver.lookup("new0001") == "https://example.com/new"
+
+
+def test_authoritative_snapshot_redirect(client, tmp_path, monkeypatch):
+    write_snapshot(str(tmp_path / "base.snap"), [("snap123", "https://example.com/snap")], 1, 0)
+    monkeypatch.setattr(settings, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "SNAPSHOT_AUTHORITATIVE", True)
+    monkeypatch.setattr(snapshot, "_resolver", None)
+
+    response = client.get("/snap123", follow_redirects=False)
+    assert response.status_code == 302
+    assert response.headers["location"] == "https://example.com/snap"
+
+    # Links created after the snapshot are not visible until the next build
+    created = client.post("/v1/shorten", json={"url": "https://example.com/later"})
+    response = client.get(f"/{created.json()['short_code']}", follow_redirects=False)
+    assert response.status_code == 404
+    monkeypatch.setattr(snapshot, "_resolver", None)
+
+
+def test_authoritative_mode_touches_neither_redis_nor_db(client, tmp_path, monkeypatch):
+    """Redirects, batch resolve, rate limiting and /health work with Redis and the DB gone."""
+    from app.db.Connection import database
+    from app.main import app
+    from app.services.health import health_monitor
+
+    def forbidden(*args, **kwargs):
+        raise AssertionError("Redis/DB used in SNAPSHOT_AUTHORITATIVE mode")
+
+    class ForbiddenSession:
+        def __getattr__(self, name):
+            forbidden()
+
+    write_snapshot(str(tmp_path / "base.snap"), [("snap123", "https://example.com/snap")], 1, 0)
+    monkeypatch.setattr(settings, "SNAPSHOT_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "SNAPSHOT_AUTHORITATIVE", True)
+    monkeypatch.setattr(settings, "CLICK_STREAM_ENABLED", False)
+    monkeypatch.setattr(snapshot, "_resolver", None)
+    monkeypatch.setattr(database, "get_redis", forbidden)
+    monkeypatch.setattr(database, "new_session", forbidden)
+    monkeypatch.setattr(health_monitor, "status", forbidden)
+    app.dependency_overrides[database.get_db] = lambda: ForbiddenSession()
+
+    response = client.get("/snap123", follow_redirects=False)
+    assert response.status_code == 302
+    assert client.get("/nothere", follow_redirects=False).status_code == 404
+    results = client.post("/v1/resolve", json={"short_codes": ["snap123", "nothere"]}).json()["results"]
+    assert [r["found"] for r in results] == [True, False]
+
+    health = client.get("/health")
+    assert health.status_code == 200
+    assert health.json()["snapshot"]["base_entries"] == 1
+    monkeypatch.setattr(snapshot, "_resolver", None)
+
+
+def test_local_rate_limit(monkeypatch):
+    """Per-worker fixed window used instead of Redis on snapshot-only nodes."""
+    from app import RateLimitHelper
+
+    monkeypatch.setattr(RateLimitHelper, "_local_windows", {})
+    assert all(RateLimitHelper.check_local_rate_limit("k", 3, 60) for _ in range(3))
+    assert RateLimitHelper.check_local_rate_limit("k", 3, 60) is False
+    assert RateLimitHelper.check_local_rate_limit("other", 3, 60) is True
@@ -0,0 +1,140 @@
+"""Build the memory-mapped redirect snapshot served by app/services/snapshot.py.
+
+A full build exports every active link into SNAPSHOT_DIR/base.snap and drops the
+deltas of the previous base. A delta build exports links created since the newest
+file (inactive ones as tombstones) into delta-<base_id>-<seq>.snap. Both appear
+atomically; running servers pick them up within SNAPSHOT_REFRESH_SECONDS.
+
+    python -m app.tools.build_snapshot --full
+    python -m app.tools.build_snapshot --delta     # e.g. every minute from cron
+
+Once SNAPSHOT_MAX_DELTAS deltas exist, a delta build merges them and the new rows
+into a single delta (newest entry wins), so the resolver never checks more than that.
+
+Deactivating a link needs a full build (urls has no updated_at to find it by).
+"""
+import argparse
+import calendar
+import heapq
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.Connection import database
+from app.services.snapshot import BASE_NAME, DELTA_PATTERN, SnapshotFile, write_snapshot
+
+# Re-export links created this long before the cursor: rows committed late by a
+# slow transaction are not missed, and repeating a row in a delta is harmless
+DELTA_OVERLAP = timedelta(seconds=60)
+
+
+def _to_ms(value: datetime) -> int:
+    return calendar.timegm(value.utctimetuple()) * 1000 + value.microsecond // 1000
+
+
+def _cursor(conn, fallback: int) -> int:
+    # Taken before streaming: rows created meanwhile are exported again by the next delta
+    latest = conn.execute(text("SELECT max(created_at) FROM urls")).scalar()
+    if isinstance(latest, str):  # SQLite returns DateTime aggregates as text
+        latest = datetime.fromisoformat(latest)
+    return _to_ms(latest) if latest else fallback
+
+
+def _rows(conn, where: str, params: dict):
+    # Bytewise order, the same order the resolver binary-searches in
+    collate = ' COLLATE "C"' if conn.dialect.name == "postgresql" else ""
+    result = conn.execution_options(stream_results=True, yield_per=10000).execute(
+        text(f"SELECT short_code, original_url, is_active FROM urls "
+             f"WHERE {where} ORDER BY short_code{collate}"),
+        params,
+    )
+    for short_code, original_url, is_active in result:
+        yield short_code, original_url if is_active else None
+
+
+def _deltas(directory: str, base_id: int) -> list:
+    found = []
+    for name in os.listdir(directory):
+        match = DELTA_PATTERN.match(name)
+        if match and int(match.group(1)) == base_id:
+            found.append((int(match.group(2)), os.path.join(directory, name)))
+    return sorted(found)
+
+
+def _ranked(rank: int, rows):
+    for short_code, url in rows:
+        yield short_code.encode(), rank, short_code, url
+
+
+def _merge_newest_first(sources: list):
+    """Merges sorted (short_code, url) streams; on duplicates the earliest source wins."""
+    previous = None
+    for key, _, short_code, url in heapq.merge(*[_ranked(rank, rows) for rank, rows in enumerate(sources)]):
+        if key != previous:
+            previous = key
+            yield short_code, url
+
+
+def build_full(engine, directory: str) -> int:
+    os.makedirs(directory, exist_ok=True)
+    base_id = int(time.time() * 1000)
+    with engine.connect() as conn:
+        cursor_ms = _cursor(conn, 0)
+        count = write_snapshot(os.path.join(directory, BASE_NAME), _rows(conn, "is_active", {}),
+                               base_id, cursor_ms)
+    for name in os.listdir(directory):
+        match = DELTA_PATTERN.match(name)
+        if match and int(match.group(1)) != base_id:
+            os.unlink(os.path.join(directory, name))
+    return count
+
+
+def build_delta(engine, directory: str) -> int:
+    base = SnapshotFile(os.path.join(directory, BASE_NAME))
+    deltas = _deltas(directory, base.base_id)
+    last_cursor = max([base.cursor_ms] + [SnapshotFile(path).cursor_ms for _, path in deltas])
+    since = datetime.utcfromtimestamp(last_cursor / 1000) - DELTA_OVERLAP
+    seq = deltas[-1][0] + 1 if deltas else 1
+
+    with engine.connect() as conn:
+        cursor_ms = _cursor(conn, last_cursor)
+        if cursor_ms <= last_cursor:
+            return 0
+        rows = list(_rows(conn, "created_at > :since", {"since": since}))
+    merged = deltas if len(deltas) + 1 > settings.SNAPSHOT_MAX_DELTAS else []
+    if merged:
+        # Newest first: the new rows, then the existing deltas from newest to oldest
+        sources = [rows] + [SnapshotFile(path).entries() for _, path in reversed(merged)]
+        rows = _merge_newest_first(sources)
+    count = write_snapshot(os.path.join(directory, f"delta-{base.base_id}-{seq:06d}.snap"),
+                           rows, base.base_id, cursor_ms)
+    # The merged delta is the newest file, so readers still see everything meanwhile
+    for _, path in merged:
+        os.unlink(path)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--full", action="store_true")
+    mode.add_argument("--delta", action="store_true")
+    parser.add_argument("--dir", default=settings.SNAPSHOT_DIR, help="snapshot directory (default SNAPSHOT_DIR)")
+    args = parser.parse_args()
+    if not args.dir:
+        parser.error("no snapshot directory: set SNAPSHOT_DIR or pass --dir")
+
+    engine = database.get_engine()
+    try:
+        start = time.perf_counter()
+        count = build_full(engine, args.dir) if args.full else build_delta(engine, args.dir)
+        print(f"{'full' if args.full else 'delta'}: {count} entries in {time.perf_counter() - start:.1f}s")
+    finally:
+        database.close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Report Redis memory per cached link for the "string" and "compact" cache layouts.
+
+Loads the same sample of links into a scratch Redis database under each layout
+and compares used_memory before/after. Point it at a standalone node; the
+scratch database is flushed.
+
+    python -m app.tools.cache_memory_report --host localhost --links 200000
+    python -m app.tools.cache_memory_report --from-db --links 100000 --compress-min-length 120
+"""
+import argparse
+import random
+import string
+
+import redis
+
+from app.db.redis_keys import url_key, url_bucket_key
+from app.services.RedisURLCache import CACHE_TTL
+from app.utils.cache_encoding import bucket_for, encode_entry
+from app.utils.encoding import generate_short_code
+
+BATCH = 1000
+
+
+def synthetic_links(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    hosts = ["example.com", "news.example.org", "shop.example.net", "docs.example.io"]
+    for _ in range(n):
+        path = "".join(rng.choices(string.ascii_lowercase + string.digits + "/-", k=int(rng.lognormvariate(3.8, 0.6))))
+        yield generate_short_code(), f"https://{rng.choice(hosts)}/{path}"
+
+
+def db_links(n: int):
+    from app.db.Connection import database
+    from app.db.Models.models import URLItem
+
+    db = database.new_session()
+    try:
+        query = db.query(URLItem.short_code, URLItem.original_url).filter(URLItem.is_active.isnot(False))
+        for short_code, original_url in query.limit(n).yield_per(BATCH):
+            yield short_code, original_url
+    finally:
+        db.close()
+        database.close_connections()
+
+
+def used_memory(client) -> int:
+    return client.info("memory")["used_memory"]
+
+
+def load_string(client, links):
+    pipe = client.pipeline(transaction=False)
+    for i, (code, url) in enumerate(links, 1):
+        pipe.setex(url_key(code), CACHE_TTL, url)
+        if i % BATCH == 0:
+            pipe.execute()
+    pipe.execute()
+
+
+def load_compact(client, links, buckets: int, compress_min_length: int):
+    pipe = client.pipeline(transaction=False)
+    seen = set()
+    for i, (code, url) in enumerate(links, 1):
+        bucket = url_bucket_key(bucket_for(code, buckets))
+        pipe.hset(bucket, code, encode_entry(url, CACHE_TTL, compress_min_length))
+        if bucket not in seen:
+            seen.add(bucket)
+            pipe.expire(bucket, CACHE_TTL)
+        if i % BATCH == 0:
+            pipe.execute()
+    pipe.execute()
+    return seen
+
+
+def measure(client, load) -> int:
+    client.flushdb()
+    before = used_memory(client)
+    load()
+    return used_memory(client) - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--scratch-db", type=int, default=15, help="database index to use (FLUSHED)")
+    parser.add_argument("--links", type=int, default=100000)
+    parser.add_argument("--from-db", action="store_true", help="sample links from Postgres instead of synthetic ones")
+    parser.add_argument("--buckets", type=int, default=None, help="defaults to ~100 links per bucket")
+    parser.add_argument("--compress-min-length", type=int, default=0)
+    args = parser.parse_args()
+
+    links = list(db_links(args.links) if args.from_db else synthetic_links(args.links))
+    if not links:
+        raise SystemExit("No links to load")
+    buckets = args.buckets or max(1, len(links) // 100)
+
+    client = redis.Redis(host=args.host, port=args.port, db=args.scratch_db, decode_responses=True)
+    limits = client.config_get("hash-max-listpack-*")
+    avg_url = sum(len(url) for _, url in links) / len(links)
+
+    string_bytes = measure(client, lambda: load_string(client, links))
+    compact_bytes = measure(client, lambda: load_compact(client, links, buckets, args.compress_min_length))
+    sample_bucket = url_bucket_key(bucket_for(links[0][0], buckets))
+    encoding = client.object("encoding", sample_bucket)
+    client.flushdb()
+
+    print(f"links: {len(links)}  avg url length: {avg_url:.0f} bytes  buckets: {buckets}")
+    print(f"redis limits: {limits}")
+    print(f"string layout : {string_bytes / len(links):8.1f} bytes/link  ({string_bytes / 2**20:.1f} MiB)")
+    print(f"compact layout: {compact_bytes / len(links):8.1f} bytes/link  ({compact_bytes / 2**20:.1f} MiB), "
+          f"bucket encoding: {encoding}")
+    if encoding != "listpack":
+        print("warning: buckets are not listpack-encoded; raise hash-max-listpack-value / "
+              "hash-max-listpack-entries or use more buckets / --compress-min-length")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Measure cold start: time from launching a server process to its first served redirect.
+
+    python -m app.tools.cold_start --code abc1234
+    python -m app.tools.cold_start --code abc1234 --cmd "gunicorn -c gunicorn.conf.py app.main:app" --port 8080
+"""
+import argparse
+import http.client
+import os
+import shlex
+import signal
+import statistics
+import subprocess
+import time
+
+
+def wait_for_redirect(host: str, port: int, code: str, timeout: float) -> int:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=1)
+            conn.request("GET", f"/{code}")
+            status = conn.getresponse().status
+            conn.close()
+            if status < 500:
+                return status
+        except OSError:
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"No response from {host}:{port} within {timeout}s")
+
+
+def measure_once(cmd: str, host: str, port: int, code: str, timeout: float) -> tuple[float, int]:
+    start = time.perf_counter()
+    proc = subprocess.Popen(shlex.split(cmd), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    try:
+        status = wait_for_redirect(host, port, code, timeout)
+        return time.perf_counter() - start, status
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--code", required=True, help="short code to request (should exist, for a 302)")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--cmd", default=None, help="server command, defaults to a single uvicorn worker")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    cmd = args.cmd or f"uvicorn app.main:app --host {args.host} --port {args.port}"
+    samples = []
+    for i in range(args.runs):
+        elapsed, status = measure_once(cmd, args.host, args.port, args.code, args.timeout)
+        samples.append(elapsed)
+        print(f"run {i + 1}: {elapsed * 1000:.1f} ms (HTTP {status})")
+
+    print(f"cold start to first redirect: median {statistics.median(samples) * 1000:.1f} ms, "
+          f"min {min(samples) * 1000:.1f} ms, max {max(samples) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
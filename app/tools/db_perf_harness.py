@@ -0,0 +1,320 @@
+"""Query-plan regression checks against a large, realistic Postgres dataset.
+
+The unit tests run on an empty SQLite database and can't see plans or scale
+problems. This harness loads N links (Zipf-distributed click counts) and M click
+events (Zipf over links, spread over the last months) into a scratch schema with
+COPY, runs every repository / service query through the real code, re-runs each
+captured statement under EXPLAIN (ANALYZE, BUFFERS) and fails (exit 1) when a
+plan contains a Seq Scan or the execution time exceeds the query's budget.
+increment_click is additionally hammered on the hottest link from several
+threads to expose row-lock contention.
+
+    python -m app.tools.db_perf_harness --rows 20000000 --events 50000000
+    python -m app.tools.db_perf_harness --reuse --report plans.json   # skip loading
+
+Everything lives in the --schema (default "perf") of the configured database.
+"""
+import argparse
+import json
+import math
+import random
+import statistics
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Callable, List
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db import repository
+from app.db.Connection import database
+from app.db.Models import models
+from app.db.migrate import ensure_click_event_partitions
+from app.services.Analytics import URL
+from app.utils.encoding import ALPHABET, BASE, SHORT_CODE_LENGTH, encode_short_code
+
+# i -> (i * P) % n is a permutation only when gcd(P, n) == 1: CODE_SCATTER is odd and
+# not a multiple of 3 (n = 36^7), RANK_SCATTER is prime (n = --rows, checked in main)
+CODE_SCATTER = 2862933555777941759
+RANK_SCATTER = 2654435761
+EVENT_MONTHS = 3
+COPY_CHUNK = 1 << 20
+
+
+def short_code_for(i: int) -> str:
+    """Distinct, randomly spread 7-char code for row i (i < 36^7)."""
+    value = (i * CODE_SCATTER) % BASE ** SHORT_CODE_LENGTH
+    chars = []
+    for _ in range(SHORT_CODE_LENGTH):
+        value, rem = divmod(value, BASE)
+        chars.append(ALPHABET[rem])
+    return "".join(chars)
+
+
+def zipf_clicks(rank: int, top: int, s: float) -> int:
+    return int(top / rank ** s)
+
+
+def zipf_rank(rng: random.Random, n: int) -> int:
+    """Rank in 1..n with P(rank) ~ 1/rank (log-uniform)."""
+    return min(n, int(n ** rng.random()))
+
+
+class RowStream:
+    """File-like view over a generator of text lines, so COPY streams the rows
+    chunk by chunk without materializing the whole dataset."""
+
+    def __init__(self, lines, chunk_lines: int = 10000):
+        self._lines = lines
+        self._chunk_lines = chunk_lines
+
+    def read(self, size=-1):
+        # copy_expert sends whatever read() returns, the size is only a hint
+        return "".join(islice(self._lines, self._chunk_lines)).encode()
+
+
+def url_lines(n: int, s: float, seed: int = 7):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    for i in range(n):
+        code = short_code_for(i)
+        rank = (i * RANK_SCATTER) % n + 1
+        created = now - timedelta(seconds=rng.randrange(365 * 86400))
+        active = "f" if rng.random() < 0.01 else "t"
+        yield (f"{i + 1}\t{code}\t{encode_short_code(code)}\thttps://example{i % 1000}.com/p/{i}\t"
+               f"{created:%Y-%m-%d %H:%M:%S}\t{now:%Y-%m-%d %H:%M:%S}\t{zipf_clicks(rank, 10 ** 7, s)}\t{active}\n")
+
+
+def event_lines(m: int, n: int, seed: int = 11):
+    rng = random.Random(seed)
+    inverse = pow(RANK_SCATTER, -1, n)
+    start = time.time() - EVENT_MONTHS * 30 * 86400
+    for j in range(m):
+        i = ((zipf_rank(rng, n) - 1) * inverse) % n
+        clicked = datetime.utcfromtimestamp(start + rng.random() * EVENT_MONTHS * 30 * 86400)
+        yield f"{j}-0\t{clicked:%Y-%m-%d %H:%M:%S}\t{short_code_for(i)}\t\\N\tperf-harness\t10.0.0.{j % 256}\n"
+
+
+def copy_into(raw_conn, schema: str, table: str, columns: str, lines):
+    """COPY with the table's secondary indexes dropped and rebuilt afterwards."""
+    with raw_conn.cursor() as cur:
+        cur.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE schemaname = %s AND tablename = %s "
+            "AND indexname NOT IN (SELECT conname FROM pg_constraint)",
+            (schema, table),
+        )
+        indexes = cur.fetchall()
+        for name, _ in indexes:
+            cur.execute(f'DROP INDEX "{schema}"."{name}"')
+        cur.copy_expert(f"COPY {table} ({columns}) FROM STDIN", RowStream(lines), size=COPY_CHUNK)
+        for _, definition in indexes:
+            cur.execute(definition)
+        cur.execute(f"ANALYZE {table}")
+    raw_conn.commit()
+
+
+def load_dataset(engine, schema: str, rows: int, events: int, s: float):
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE'))
+        conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+    models.Base.metadata.create_all(bind=engine)
+    first_month = (date.today().replace(day=1) - timedelta(days=EVENT_MONTHS * 31)).replace(day=1)
+    ensure_click_event_partitions(engine, months_ahead=EVENT_MONTHS + 2, today=first_month)
+
+    raw = engine.raw_connection()
+    try:
+        start = time.perf_counter()
+        copy_into(raw, schema, "urls",
+                  "id, short_code, code_id, original_url, created_at, last_accessed_at, click_count, is_active",
+                  url_lines(rows, s))
+        print(f"loaded {rows} urls in {time.perf_counter() - start:.0f}s")
+        with raw.cursor() as cur:
+            cur.execute("SELECT setval('urls_id_seq', %s)", (rows,))
+        raw.commit()
+        if events:
+            start = time.perf_counter()
+            copy_into(raw, schema, "click_events",
+                      "stream_id, clicked_at, short_code, referrer, user_agent, client_ip",
+                      event_lines(events, rows))
+            print(f"loaded {events} click events in {time.perf_counter() - start:.0f}s")
+    finally:
+        raw.close()
+
+
+def seq_scans(plan: dict) -> List[str]:
+    """Relations read by a Seq Scan anywhere in an EXPLAIN (FORMAT JSON) plan node."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan":
+        found.append(plan.get("Relation Name", "?"))
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+@dataclass
+class QueryCheck:
+    name: str
+    run: Callable
+    budget_ms: float
+    statements: list = field(default_factory=list)
+    failures: list = field(default_factory=list)
+    plans: list = field(default_factory=list)
+
+
+def capture_statements(engine, fn) -> list:
+    """Runs fn and returns the (statement, parameters) it sent, except INSERTs,
+    whose EXPLAIN ANALYZE would hit the rows fn just committed."""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE", "DELETE", "WITH"):
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def explain(engine, statement: str, parameters) -> dict:
+    raw = engine.raw_connection()
+    try:
+        with raw.cursor() as cur:
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters)
+            return cur.fetchone()[0][0]
+    finally:
+        raw.rollback()  # EXPLAIN ANALYZE really executes UPDATEs
+        raw.close()
+
+
+def run_check(engine, check: QueryCheck):
+    check.statements = capture_statements(engine, check.run)
+    for statement, parameters in check.statements:
+        plan = explain(engine, statement, parameters)
+        check.plans.append({"statement": statement, "plan": plan})
+        for relation in seq_scans(plan["Plan"]):
+            check.failures.append(f"Seq Scan on {relation}")
+        if plan["Execution Time"] > check.budget_ms:
+            check.failures.append(f"{plan['Execution Time']:.1f} ms > budget {check.budget_ms:.0f} ms")
+
+
+def contention(engine, short_code: str, threads: int, seconds: float) -> List[float]:
+    """increment_click on one hot row from several sessions; returns latencies in ms."""
+    make_session = sessionmaker(bind=engine, autoflush=False)
+    latencies, lock = [], threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker():
+        db = make_session()
+        local = []
+        try:
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                repository.increment_click(db, short_code)
+                local.append((time.perf_counter() - start) * 1000)
+        finally:
+            db.close()
+        with lock:
+            latencies.extend(local)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return latencies
+
+
+def build_checks(db, hot_code: str, cold_code: str, sample_codes: list, sample_url: str, budget: float) -> list:
+    def integer_lookup():
+        previous, settings.SHORT_CODE_STORAGE = settings.SHORT_CODE_STORAGE, "integer"
+        try:
+            repository.get_url_by_short_code(db, cold_code)
+        finally:
+            settings.SHORT_CODE_STORAGE = previous
+
+    return [
+        QueryCheck("get_url_by_short_code", lambda: repository.get_url_by_short_code(db, cold_code), budget),
+        QueryCheck("get_url_by_short_code[integer]", integer_lookup, budget),
+        QueryCheck("get_urls_by_short_codes[100]", lambda: repository.get_urls_by_short_codes(db, sample_codes), budget * 4),
+        QueryCheck("get_url_by_original", lambda: repository.get_url_by_original(db, sample_url), budget),
+        QueryCheck("increment_click", lambda: repository.increment_click(db, hot_code), budget),
+        QueryCheck("URL.get_all[first page]", lambda: URL.get_all(0, 50, db), budget * 10),
+        QueryCheck("URL.get_all[deep page]", lambda: URL.get_all(100000, 50, db), budget * 10),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--schema", default="perf")
+    parser.add_argument("--rows", type=int, default=10000000)
+    parser.add_argument("--events", type=int, default=20000000)
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of urls.click_count")
+    parser.add_argument("--reuse", action="store_true", help="keep the existing dataset in --schema")
+    parser.add_argument("--budget-ms", type=float, default=5.0, help="base execution-time budget per query")
+    parser.add_argument("--threads", type=int, default=16, help="sessions in the increment_click contention run")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--p99-budget-ms", type=float, default=20.0)
+    parser.add_argument("--skip", action="append", default=[], help="check name to skip (repeatable)")
+    parser.add_argument("--report", help="write all captured plans to this JSON file")
+    args = parser.parse_args()
+    if not 0 < args.rows <= BASE ** SHORT_CODE_LENGTH or math.gcd(args.rows, RANK_SCATTER) != 1:
+        parser.error(f"--rows must be in 1..{BASE ** SHORT_CODE_LENGTH} and not a multiple of {RANK_SCATTER}")
+
+    # Every unqualified table (repository, migrate helpers) resolves to the scratch schema
+    engine = create_engine(database.SQLALCHEMY_DATABASE_URL, future=True,
+                           pool_size=args.threads + 2,
+                           connect_args={"options": f"-csearch_path={args.schema}"})
+    try:
+        if not args.reuse:
+            load_dataset(engine, args.schema, args.rows, args.events, args.zipf)
+
+        db = sessionmaker(bind=engine, autoflush=False)()
+        with engine.connect() as conn:
+            n = conn.execute(text("SELECT max(id) FROM urls")).scalar()
+            hot_code = conn.execute(text("SELECT short_code FROM urls ORDER BY click_count DESC LIMIT 1")).scalar()
+        rng = random.Random(3)
+        sample = [short_code_for(rng.randrange(n)) for _ in range(100)]
+        cold_index = rng.randrange(n)
+        cold_code = short_code_for(cold_index)
+        sample_url = f"https://example{cold_index % 1000}.com/p/{cold_index}"
+
+        failed = False
+        report = []
+        for check in build_checks(db, hot_code, cold_code, sample, sample_url, args.budget_ms):
+            if check.name in args.skip:
+                continue
+            run_check(engine, check)
+            db.rollback()
+            times = [p["plan"]["Execution Time"] for p in check.plans]
+            status = "FAIL" if check.failures else "ok"
+            print(f"{status:4s} {check.name:32s} {len(check.plans)} stmt  "
+                  f"{sum(times):8.2f} ms  {'; '.join(check.failures)}")
+            failed = failed or bool(check.failures)
+            report.append({"check": check.name, "failures": check.failures, "plans": check.plans})
+
+        if "increment_click[contention]" not in args.skip:
+            latencies = contention(engine, hot_code, args.threads, args.seconds)
+            p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else float("inf")
+            status = "FAIL" if p99 > args.p99_budget_ms else "ok"
+            print(f"{status:4s} {'increment_click[contention]':32s} {args.threads} threads  "
+                  f"{len(latencies) / args.seconds:8.0f}/s  p50 {statistics.median(latencies):.1f} ms  p99 {p99:.1f} ms")
+            failed = failed or status == "FAIL"
+
+        if args.report:
+            with open(args.report, "w") as f:
+                json.dump(report, f, indent=2, default=str)
+    finally:
+        engine.dispose()
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Compare the varchar(10) short_code index with the BIGINT code_id index in Postgres.
+
+Builds two scratch tables with the same N random codes (COPY), then reports index
+size and lookup latency: server-side (index nested loop over M probe keys, from
+EXPLAIN ANALYZE) and client-side (M single-row queries).
+
+    python -m app.tools.short_code_index_benchmark --rows 5000000 --lookups 20000
+"""
+import argparse
+import io
+import random
+import time
+
+from sqlalchemy import text
+
+from app.db.Connection import database
+from app.utils.encoding import ALPHABET, SHORT_CODE_LENGTH, encode_short_code
+
+LAYOUTS = {
+    "varchar": ("bench_codes_varchar", "short_code VARCHAR(10) NOT NULL", "short_code", "varchar"),
+    "bigint": ("bench_codes_bigint", "code_id BIGINT NOT NULL", "code_id", "bigint"),
+}
+
+
+def random_codes(n: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    codes = set()
+    while len(codes) < n:
+        codes.add("".join(rng.choices(ALPHABET, k=SHORT_CODE_LENGTH)))
+    return list(codes)
+
+
+def load(raw_conn, table: str, column_ddl: str, column: str, values: list):
+    with raw_conn.cursor() as cur:
+        cur.execute(f"DROP TABLE IF EXISTS {table}")
+        cur.execute(f"CREATE UNLOGGED TABLE {table} (id BIGSERIAL, {column_ddl})")
+        buf = io.StringIO("\n".join(str(v) for v in values) + "\n")
+        cur.copy_expert(f"COPY {table} ({column}) FROM STDIN", buf)
+        cur.execute(f"CREATE UNIQUE INDEX {table}_idx ON {table} ({column})")
+        cur.execute(f"ANALYZE {table}")
+    raw_conn.commit()
+
+
+def measure(conn, table: str, column: str, sql_type: str, probes: list) -> dict:
+    index_bytes = conn.execute(text(f"SELECT pg_relation_size('{table}_idx')")).scalar()
+
+    conn.execute(text("SET enable_hashjoin = off"))
+    conn.execute(text("SET enable_mergejoin = off"))
+    plan = conn.execute(
+        text(f"EXPLAIN (ANALYZE, FORMAT JSON) SELECT count(*) FROM unnest(CAST(:keys AS {sql_type}[])) k "
+             f"JOIN {table} t ON t.{column} = k"),
+        {"keys": probes},
+    ).scalar()
+    conn.execute(text("RESET enable_hashjoin"))
+    conn.execute(text("RESET enable_mergejoin"))
+    server_ms = plan[0]["Execution Time"]
+
+    query = text(f"SELECT id FROM {table} WHERE {column} = :key")
+    start = time.perf_counter()
+    for key in probes:
+        conn.execute(query, {"key": key}).first()
+    client_ms = (time.perf_counter() - start) * 1000
+
+    return {
+        "index_mib": index_bytes / 2**20,
+        "server_us": server_ms * 1000 / len(probes),
+        "client_us": client_ms * 1000 / len(probes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--lookups", type=int, default=10000)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch tables")
+    args = parser.parse_args()
+
+    codes = random_codes(args.rows)
+    probes = random.Random(11).sample(codes, min(args.lookups, len(codes)))
+    engine = database.get_engine()
+    try:
+        raw = engine.raw_connection()
+        try:
+            load(raw, *LAYOUTS["varchar"][:3], codes)
+            load(raw, *LAYOUTS["bigint"][:3], [encode_short_code(c) for c in codes])
+        finally:
+            raw.close()
+
+        print(f"rows: {args.rows}  lookups: {len(probes)}")
+        with engine.connect() as conn:
+            for name, (table, _, column, sql_type) in LAYOUTS.items():
+                keys = probes if name == "varchar" else [encode_short_code(c) for c in probes]
+                result = measure(conn, table, column, sql_type, keys)
+                print(f"{name:8s} index {result['index_mib']:8.1f} MiB   "
+                      f"server {result['server_us']:6.2f} us/lookup   client {result['client_us']:7.1f} us/lookup")
+            if not args.keep:
+                for table, *_ in LAYOUTS.values():
+                    conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+                conn.commit()
+    finally:
+        database.close_connections()
+
+
+if __name__ == "__main__":
+    main()
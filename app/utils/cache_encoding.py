@@ -0,0 +1,66 @@
+import base64
+import binascii
+import time
+import zlib
+from typing import Optional
+
+from app.utils.encoding import ALPHABET, BASE
+
+# Compact cache layout: links are grouped into small hashes (buckets) so Redis
+# keeps them listpack-encoded instead of paying a dictEntry/robj/expire entry per
+# link. Each field value embeds its own expiry: "<expires_at base36>|<flag><url>"
+# where flag "r" is the raw URL and "z" is zlib + base64 (only when shorter).
+
+RAW_FLAG = "r"
+ZLIB_FLAG = "z"
+
+
+def _to_base36(value: int) -> str:
+    out = ""
+    while True:
+        value, rem = divmod(value, BASE)
+        out = ALPHABET[rem] + out
+        if value == 0:
+            return out
+
+
+def bucket_for(short_code: str, buckets: int) -> int:
+    return zlib.crc32(short_code.encode()) % buckets
+
+
+def encode_entry(original_url: str, ttl: int, compress_min_length: int = 0, now: Optional[float] = None) -> str:
+    expires_at = int((now if now is not None else time.time()) + ttl)
+    payload = RAW_FLAG + original_url
+    if compress_min_length and len(original_url) >= compress_min_length:
+        packed = base64.b64encode(zlib.compress(original_url.encode(), 9)).decode()
+        if len(packed) < len(original_url):
+            payload = ZLIB_FLAG + packed
+    return f"{_to_base36(expires_at)}|{payload}"
+
+
+def is_expired(entry: str, now: Optional[float] = None) -> bool:
+    """True for expired or malformed entries (both are safe to delete)."""
+    expires_at, sep, _ = entry.partition("|")
+    try:
+        return not sep or int(expires_at, 36) <= (now if now is not None else time.time())
+    except ValueError:
+        return True
+
+
+def decode_entry(entry: str, now: Optional[float] = None) -> Optional[str]:
+    """Returns the URL, or None if the entry expired or is malformed."""
+    expires_at, sep, payload = entry.partition("|")
+    if not sep or not payload:
+        return None
+    try:
+        if int(expires_at, 36) <= (now if now is not None else time.time()):
+            return None
+    except ValueError:
+        return None
+    flag, body = payload[0], payload[1:]
+    if flag == ZLIB_FLAG:
+        try:
+            return zlib.decompress(base64.b64decode(body, validate=True)).decode()
+        except (binascii.Error, zlib.error, UnicodeDecodeError):
+            return None
+    return body
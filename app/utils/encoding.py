@@ -1,4 +1,5 @@
 import secrets
+from typing import Optional
 
 # Base36 alphabet (lowercase only for case-insensitive URLs)
 ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
@@ -12,3 +13,29 @@ def generate_short_code() -> str:
 
 def normalize_short_code(code: str) -> str:
     return code.lower().strip()
+
+
+MAX_SHORT_CODE_LENGTH = 10
+_ALPHABET_INDEX = {ch: i for i, ch in enumerate(ALPHABET)}
+
+
+def encode_short_code(code: str) -> Optional[int]:
+    """Bijective base36, so codes with leading '0's stay distinct; 36^10 fits in a BIGINT.
+    Returns None for codes that can't be encoded (e.g. custom aliases with '_')."""
+    if not code or len(code) > MAX_SHORT_CODE_LENGTH:
+        return None
+    value = 0
+    for ch in code:
+        digit = _ALPHABET_INDEX.get(ch)
+        if digit is None:
+            return None
+        value = value * BASE + digit + 1
+    return value
+
+
+def decode_short_code(value: int) -> str:
+    chars = []
+    while value > 0:
+        value, rem = divmod(value - 1, BASE)
+        chars.append(ALPHABET[rem])
+    return ''.join(reversed(chars))
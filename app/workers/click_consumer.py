@@ -0,0 +1,208 @@
+"""Consumes click events from the Redis Stream and writes them to Postgres in batches.
+
+    python -m app.workers.click_consumer
+
+Runs as its own process (any number of replicas, one consumer group). Each batch is
+COPYed into a staging table, inserted into the partitioned click_events table with
+ON CONFLICT DO NOTHING and aggregated into urls.click_count/last_accessed_at in the
+same transaction; entries are XACKed only after commit (at-least-once). Replays
+after a crash are de-duplicated by the stream id, so counters are not double counted.
+"""
+import csv
+import io
+import logging
+import os
+import signal
+import socket
+import time
+from datetime import datetime, date
+
+import psycopg2
+import redis.exceptions
+
+from app.core.config import settings
+from app.core.logging_config import configure_logging, start_log_listener
+from app.db.Connection import database
+from app.db.migrate import ensure_click_event_partitions
+from app.db.redis_keys import CLICK_STREAM_KEY, CLICK_STREAM_GROUP
+
+logger = logging.getLogger(__name__)
+
+# Entries pending longer than this on another consumer are assumed orphaned
+CLAIM_IDLE_MS = 60000
+
+# Errors caused by the row itself; anything else (connection, timeout) retries the batch
+BAD_ROW_ERRORS = (psycopg2.DataError, psycopg2.IntegrityError)
+MAX_CLIENT_IP_LENGTH = 45
+MAX_SHORT_CODE_LENGTH = 10
+
+COLUMNS = ("stream_id", "clicked_at", "short_code", "referrer", "user_agent", "client_ip")
+
+WRITE_BATCH_SQL = """
+WITH inserted AS (
+    INSERT INTO click_events ({columns})
+    SELECT {columns} FROM click_events_staging
+    ON CONFLICT DO NOTHING
+    RETURNING short_code, clicked_at
+), counts AS (
+    SELECT short_code, count(*) AS clicks, max(clicked_at) AS last_at
+    FROM inserted GROUP BY short_code
+)
+UPDATE urls SET
+    click_count = coalesce(urls.click_count, 0) + counts.clicks,
+    last_accessed_at = greatest(urls.last_accessed_at, counts.last_at)
+FROM counts
+WHERE urls.short_code = counts.short_code
+""".format(columns=", ".join(COLUMNS))
+
+
+def to_row(stream_id: str, fields: dict) -> tuple:
+    millis = int(stream_id.split("-", 1)[0])
+    return (
+        stream_id,
+        datetime.utcfromtimestamp(millis / 1000),
+        (fields.get("c") or "")[:MAX_SHORT_CODE_LENGTH] or None,
+        fields.get("r"),
+        fields.get("ua"),
+        (fields.get("ip") or "")[:MAX_CLIENT_IP_LENGTH] or None,
+    )
+
+
+def write_batch(engine, rows: list):
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    buf.seek(0)
+
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS click_events_staging "
+                "(LIKE click_events INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+            )
+            cur.copy_expert(
+                f"COPY click_events_staging ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buf
+            )
+            cur.execute(WRITE_BATCH_SQL)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+class ClickConsumer:
+    def __init__(self, redis_client, engine, consumer_name: str = None,
+                 batch_size: int = None, block_ms: int = None):
+        self.redis = redis_client
+        self.engine = engine
+        self.name = consumer_name or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size or settings.CLICK_CONSUMER_BATCH
+        self.block_ms = block_ms or settings.CLICK_CONSUMER_BLOCK_MS
+        self.running = True
+        self._partitions_checked = None
+
+    def ensure_group(self):
+        try:
+            self.redis.xgroup_create(CLICK_STREAM_KEY, CLICK_STREAM_GROUP, id="0", mkstream=True)
+        except redis.exceptions.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def _ensure_partitions(self):
+        today = date.today()
+        if self._partitions_checked != today:
+            ensure_click_event_partitions(self.engine)
+            self._partitions_checked = today
+
+    def _read(self, stream_id: str) -> list:
+        response = self.redis.xreadgroup(
+            CLICK_STREAM_GROUP, self.name, {CLICK_STREAM_KEY: stream_id},
+            count=self.batch_size, block=None if stream_id == "0" else self.block_ms,
+        )
+        return response[0][1] if response else []
+
+    def _claim_orphans(self) -> list:
+        _, entries, *_ = self.redis.xautoclaim(
+            CLICK_STREAM_KEY, CLICK_STREAM_GROUP, self.name,
+            min_idle_time=CLAIM_IDLE_MS, start_id="0-0", count=self.batch_size,
+        )
+        return entries
+
+    def process(self, entries: list) -> int:
+        """Writes and acks one batch; returns the number of entries handled."""
+        # Entries trimmed from the stream while pending come back with no fields
+        live = [(stream_id, fields) for stream_id, fields in entries if fields]
+        if live:
+            self._ensure_partitions()
+            try:
+                write_batch(self.engine, [to_row(stream_id, fields) for stream_id, fields in live])
+            except BAD_ROW_ERRORS:
+                logger.warning("Click consumer: batch of %d rejected, writing events one by one", len(live))
+                self._write_each(live)
+            logger.debug("Wrote %d click events", len(live))
+        if entries:
+            self.redis.xack(CLICK_STREAM_KEY, CLICK_STREAM_GROUP, *[stream_id for stream_id, _ in entries])
+        return len(entries)
+
+    def _write_each(self, live: list):
+        """Isolates the rows that fail on their own; they are logged and acked so one bad
+        event cannot keep its batch pending forever. Rows already written are skipped
+        on a replay by the stream_id conflict."""
+        for stream_id, fields in live:
+            try:
+                write_batch(self.engine, [to_row(stream_id, fields)])
+            except BAD_ROW_ERRORS as e:
+                logger.error("Click consumer: dropping event %s %r: %s", stream_id, fields, e)
+
+    def _recover(self):
+        self.ensure_group()
+        # Our own un-acked entries from a previous run first, then orphans of dead consumers
+        while self.running and self.process(self._read("0")):
+            pass
+        self.process(self._claim_orphans())
+
+    def run(self):
+        recovered, last_claim = False, time.monotonic()
+        while self.running:
+            try:
+                # Startup recovery retries with the same back-off, so a DB/Redis outage
+                # at start does not kill the worker
+                if not recovered:
+                    self._recover()
+                    recovered, last_claim = True, time.monotonic()
+                    continue
+                self.process(self._read(">"))
+                if time.monotonic() - last_claim > CLAIM_IDLE_MS / 1000:
+                    self.process(self._claim_orphans())
+                    last_claim = time.monotonic()
+            except redis.exceptions.ConnectionError:
+                logger.warning("Click consumer: Redis unavailable, retrying")
+                time.sleep(1)
+            except Exception:
+                # Batch stays pending and is retried (or claimed by another consumer)
+                logger.exception("Click consumer: failed to write batch")
+                time.sleep(1)
+
+    def stop(self, *_):
+        self.running = False
+
+
+def main():
+    configure_logging()
+    start_log_listener()
+    # XREADGROUP BLOCK holds the socket for block_ms; the read timeout has to outlast it
+    settings.REDIS_SOCKET_TIMEOUT = max(settings.REDIS_SOCKET_TIMEOUT, settings.CLICK_CONSUMER_BLOCK_MS / 1000 + 1)
+    consumer = ClickConsumer(database.get_redis(), database.get_engine())
+    signal.signal(signal.SIGTERM, consumer.stop)
+    signal.signal(signal.SIGINT, consumer.stop)
+    logger.info("Click consumer %s started", consumer.name)
+    try:
+        consumer.run()
+    finally:
+        database.close_connections()
+
+
+if __name__ == "__main__":
+    main()
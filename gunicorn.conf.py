@@ -0,0 +1,21 @@
+# Multi-process launcher: gunicorn -c gunicorn.conf.py app.main:app
+#
+# The app is imported once in the master (preload_app) and forked, so code and
+# module-level read-only state are shared copy-on-write between workers. DB and
+# Redis pools are opened by the app lifespan inside each worker, after fork.
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+
+
+def pre_fork(server, worker):
+    # Move everything allocated by the preloaded import into the permanent
+    # generation so the cyclic GC in the workers doesn't touch (and copy) those pages.
+    gc.freeze()